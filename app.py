@@ -3,7 +3,7 @@ import streamlit as st
 import sys
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 import os
-import json
+import hashlib
 import re
 from utils.database import init_db
 import streamlit as st
@@ -13,13 +13,22 @@ from utils.bookings_db import get_all_bookings_df
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from models.llm import get_chatgroq_model
-from utils.rag_pipeline import retrieve_context, build_vector_store
+from models.registry import warm_up, get_resource
+from utils.llm_executor import get_llm_executor
+from config.config import (
+    STREAM_RESPONSES,
+    ANSWER_CACHE_ENABLED,
+    INGEST_JOB_POLL_SECONDS,
+    SLOT_MINUTES,
+    SLOT_SEARCH_DAYS,
+    SLOT_SUGGESTIONS,
+)
+from utils.rag_pipeline import retrieve_scored, load_vector_store, get_cache_stats
 
 from utils.storage import load_bookings
 from utils.chat_storage import load_chat, save_chat, clear_chat
 from utils.storage import save_booking
 from utils.storage import load_bookings, save_booking, save_bookings
-from utils.clinic_parser import extract_clinic_data_from_pdfs
 from utils.bookings_db import save_booking_db
 from utils.validators import (
     is_not_empty,
@@ -28,46 +37,110 @@ from utils.validators import (
     is_valid_time
 )
 from utils.emailer import send_confirmation_email
-from utils.clinic_parser import extract_clinic_data_from_pdfs
-from utils.rag_pipeline import build_vector_store
+from utils.answer_cache import (
+    get_cached_answer,
+    save_cached_answer
+)
+from utils.knowledge_base import (
+    kb_matches,
+    get_clinics,
+    get_kb_version,
+    file_sha256
+)
+from utils.ingest_jobs import (
+    enqueue_ingest,
+    get_job,
+    get_active_job,
+    start_ingest_worker
+)
+from utils.service_catalog import ServiceCatalog, get_service_catalog
+from utils.intent_router import IntentRouter
+from utils.clinic_schedule import (
+    ClinicSchedule,
+    get_clinic_schedules,
+    parse_clock,
+    parse_date,
+    format_clock,
+    describe_intervals,
+)
+from utils.slot_engine import is_slot_available, find_free_slots, is_past
 
 
 
 PDF_DIR = "data/uploaded_pdfs"
-CLINICS_CACHE = "data/clinics.json"
+
+NO_INFO_RESPONSE = (
+    "I’m sorry, I don’t have that information in the uploaded clinic documents."
+)
 
 os.makedirs(PDF_DIR, exist_ok=True)
 os.makedirs("data", exist_ok=True)
 
 
 # --------------------------------
-# Booking Intent Detection
+# Intent Routing
 # --------------------------------
+GREETINGS = ["hi", "hello", "hey", "good morning", "good evening"]
+
+BOOKING_KEYWORDS = [
+    "book", "booking", "appointment", "schedule",
+    "reserve", "slot", "consultation", "visit"
+]
+
+WORKING_HOURS_KEYWORDS = [
+    "working hours",
+    "opening hours",
+    "timings",
+    "open time",
+    "close time"
+]
+
+SERVICE_LIST_KEYWORDS = [
+    "services",
+    "available services",
+    "what are the services",
+    "list services",
+    "services available"
+]
+
+SERVICE_KEYWORDS = [
+    "service",
+    "treatment",
+    "consultation",
+    "checkup",
+    "therapy",
+    "care",
+    "appointment for",
+]
+
+# Highest priority first; anything unmatched goes to strict RAG
+INTENT_ROUTES = [
+    {"name": "greeting", "exact": GREETINGS},
+    {"name": "booking", "keywords": BOOKING_KEYWORDS},
+    {"name": "booking_flow"},  # guard: a booking is in progress
+    {"name": "working_hours", "keywords": WORKING_HOURS_KEYWORDS},
+    {"name": "service_list", "keywords": SERVICE_LIST_KEYWORDS},
+    {"name": "unknown_service", "keywords": SERVICE_KEYWORDS},  # guard: not in catalog
+]
+
+
+def get_intent_router() -> IntentRouter:
+    # Compiled once per process; recompiled only when the rules change
+    return get_resource(
+        "intent_router",
+        lambda: IntentRouter(INTENT_ROUTES, default="rag"),
+        (repr(INTENT_ROUTES),)
+    )
 
 
-def is_service_list_query(text: str) -> bool:
-    keywords = [
-        "services",
-        "available services",
-        "what are the services",
-        "list services",
-        "services available"
-    ]
-    text = text.lower()
-    return any(k in text for k in keywords)
+def current_catalog() -> ServiceCatalog:
+    catalog = st.session_state.get("service_catalog")
+    return catalog if catalog is not None else ServiceCatalog([])
 
 
 def get_clinic_from_query(query: str):
-    query_words = set(query.lower().split())
-
-    for clinic in st.session_state.get("clinics", []):
-        clinic_words = set(clinic["name"].lower().split())
-
-        # If most clinic name words appear in query → match
-        if len(query_words & clinic_words) >= max(1, len(clinic_words) - 1):
-            return clinic
-
-    return None
+    # Most clinic name words (typos allowed) appear in query → match
+    return current_catalog().match_clinic(query)
 
 
 
@@ -83,56 +156,23 @@ def format_services_response(clinics):
     return "\n".join(lines)
 
 
-def looks_like_service_query(text: str) -> bool:
-    keywords = [
-        "service",
-        "treatment",
-        "consultation",
-        "checkup",
-        "therapy",
-        "care",
-        "appointment for",
-    ]
-
-    text = text.lower()
-    return any(k in text for k in keywords)
-
-def is_working_hours_query(query: str) -> bool:
-    keywords = [
-        "working hours",
-        "opening hours",
-        "timings",
-        "open time",
-        "close time"
-    ]
-    query = query.lower()
-    return any(k in query for k in keywords)
-
 def format_working_hours_response(clinics: list) -> str:
     lines = ["Here are the working hours:\n"]
 
     for clinic in clinics:
-        open_time = clinic.get("open_time", "Not specified")
-        close_time = clinic.get("close_time", "Not specified")
-        closed_days = ", ".join(clinic.get("closed_days", []))
-
-        lines.append(
-            f"📍 **{clinic['name']}**\n"
-            f"• Monday to Saturday: {open_time} – {close_time}\n"
-            f"• Closed on {closed_days}\n"
-        )
+        schedule = schedule_for(clinic)
+        hours = [f"• {line}" for line in schedule.describe()]
+
+        if schedule.holidays:
+            holidays = ", ".join(d.strftime("%d-%m-%Y") for d in sorted(schedule.holidays))
+            hours.append(f"• Holidays: {holidays}")
+
+        lines.append(f"📍 **{clinic['name']}**\n" + "\n".join(hours) + "\n")
 
     return "\n".join(lines)
 
 
 
-def detect_booking_intent(user_input: str) -> bool:
-    keywords = [
-        "book", "booking", "appointment", "schedule",
-        "reserve", "slot", "consultation", "visit"
-    ]
-    user_input = user_input.lower()
-    return any(k in user_input for k in keywords)
 
 
 # --------------------------------
@@ -149,6 +189,8 @@ def init_booking_state():
     "name": None,
     "email": None,
     "phone": None,
+    "suggestions": [],
+    "unconfirmed_time": None,
     "confirmed": False
 }
 
@@ -168,134 +210,147 @@ from utils.emailer import send_confirmation_email
 
 
 def get_clinics_for_service(service_name: str):
-    service_name = service_name.lower()
-    clinics = []
+    return current_catalog().clinics_for(service_name)
 
-    for clinic in st.session_state.get("clinics", []):
-        for service in clinic.get("services", []):
-            if service_name in service["name"].lower():
-                clinics.append(clinic)
-                break
 
-    return clinics
+def is_service_available(service_name: str) -> bool:
+    if not service_name:
+        return False
+    return current_catalog().is_available(service_name)
 
 def is_valid_phone(phone: str) -> bool:
     return bool(re.match(r"^[6-9]\d{9}$", phone))
 
-from datetime import datetime, timedelta
 
-def is_sunday(date_input: str) -> bool:
-    date_input = date_input.lower().strip()
+def schedule_for(clinic: dict) -> ClinicSchedule:
+    """
+    Compiled hours for a clinic (built once per KB version at load time)
+    """
+    schedule = st.session_state.get("schedules", {}).get(clinic.get("name"))
+    return schedule if schedule is not None else ClinicSchedule(clinic)
 
-    # Handle natural language
-    if date_input == "today":
-        date_obj = datetime.today()
-    elif date_input == "tomorrow":
-        date_obj = datetime.today() + timedelta(days=1)
-    else:
-        # Try common date formats
-        for fmt in ("%d-%m-%Y", "%Y-%m-%d"):
-            try:
-                date_obj = datetime.strptime(date_input, fmt)
-                break
-            except ValueError:
-                continue
-        else:
-            # Invalid date format → let validation handle it elsewhere
-            return False
 
-    # Sunday = 6
-    return date_obj.weekday() == 6
+def is_time_within_clinic_hours(time_input: str, clinic: dict, date_input: str = "today", service: str = None) -> bool:
+    day = parse_date(date_input)
+    minute = parse_clock(time_input)
 
-def get_clinics_for_service(service_name: str):
-    service_name = service_name.lower().strip()
-    matched_clinics = []
+    if day is None or minute is None:
+        return False
 
-    for clinic in st.session_state.get("clinics", []):
-        for service in clinic.get("services", []):
-            if service_name in service["name"].lower():
-                matched_clinics.append(clinic)
-                break
+    # The whole slot has to fit inside the open hours
+    return schedule_for(clinic).is_open_during(day, minute, minute + SLOT_MINUTES, service)
 
-    return matched_clinics
 
-def is_service_available(service_name: str) -> bool:
-    return len(get_clinics_for_service(service_name)) > 0
+def find_clinic_by_name(name: str):
+    return current_catalog().match_clinic(name)
 
-from datetime import datetime
-from typing import Optional
 
+def is_clinic_open_on_date(date_input: str, clinic: dict, service: str = None) -> bool:
+    day = parse_date(date_input)
+    return day is not None and schedule_for(clinic).is_open_on(day, service)
 
-def normalize_time(t: str) -> Optional[datetime.time]:
+
+def suggest_slots(booking: dict, first_day=None) -> str:
     """
-    Converts '8.30 AM', '8:30 AM', '11 AM', '5 PM' → datetime.time
+    Earliest free slots for the booking (its clinic first, then any clinic
+    offering the service), remembered so the user can reply with a number
     """
-    if not t:
-        return None
+    def search(clinics):
+        return find_free_slots(
+            clinics,
+            booking["service"],
+            first_day,
+            days=SLOT_SEARCH_DAYS,
+            limit=SLOT_SUGGESTIONS,
+            schedules=st.session_state.get("schedules")
+        )
 
-    t = t.upper().replace(".", ":").strip()
+    slots = search([booking["clinic"]]) if booking["clinic"] else []
+    if not slots:
+        slots = search(get_clinics_for_service(booking["service"]))
 
-    formats = [
-        "%I:%M %p",
-        "%I %p"
-    ]
+    booking["suggestions"] = slots
+    if not slots:
+        return ""
 
-    for fmt in formats:
-        try:
-            return datetime.strptime(t, fmt).time()
-        except ValueError:
-            continue
+    lines = []
+    for i, slot in enumerate(slots, 1):
+        line = f"{i}. {slot['date'].strftime('%a %d-%m-%Y')}, {format_clock(slot['start'])}"
+        if not booking["clinic"] or slot["clinic"] != booking["clinic"]["name"]:
+            line += f" at {slot['clinic']}"
+        lines.append(line)
 
-    return None
+    return (
+        "\n\n**Earliest free slots:**\n" + "\n".join(lines) +
+        "\n\nReply with a **number** to book one."
+    )
 
 
-def is_time_within_clinic_hours(time_input: str, clinic: dict) -> bool:
-    user_time = normalize_time(time_input)
-    open_time = normalize_time(clinic.get("open_time", ""))
-    close_time = normalize_time(clinic.get("close_time", ""))
+def pick_suggested_slot(booking: dict, user_input: str):
+    """
+    '2' → apply the second suggested slot; returns the next prompt or None
+    """
+    suggestions = booking.get("suggestions") or []
+    if not user_input.isdigit() or not 1 <= int(user_input) <= len(suggestions):
+        return None
 
-    if not user_time or not open_time or not close_time:
-        return False
+    slot = suggestions[int(user_input) - 1]
+    if is_past(slot["date"], slot["start"]):
+        return "❌ That slot has just passed." + suggest_slots(booking, slot["date"])
 
-    return open_time <= user_time <= close_time
+    if not booking["clinic"] or slot["clinic"] != booking["clinic"]["name"]:
+        booking["clinic"] = find_clinic_by_name(slot["clinic"])
+    booking["date"] = slot["date"].strftime("%d-%m-%Y")
+    booking["time"] = format_clock(slot["start"])
+    return after_slot_chosen(booking)
+
+
+def after_slot_chosen(booking: dict) -> str:
+    booking["suggestions"] = []
+
+    # New time after a lost race → details are already known
+    if booking["phone"]:
+        booking["awaiting_field"] = "confirm"
+        return format_booking_summary(booking)
+
+    booking["awaiting_field"] = "name"
+    return "May I know your **full name**?"
 
-def find_clinic_by_name(name: str):
-    for clinic in st.session_state.get("clinics", []):
-        if clinic["name"].lower() == name.lower():
-            return clinic
-    return None
 
-def is_clinic_open_on_date(date_input: str, clinic: dict) -> bool:
-    if is_sunday(date_input) and "Sunday" in clinic.get("closed_days", []):
-        return False
-    return True
 def handle_booking_flow(user_input: str):
     booking = st.session_state.booking
     user_input = user_input.strip()
 
+    # A number picks one of the slots suggested on the previous turn
+    if booking["awaiting_field"] in ("date", "time"):
+        reply = pick_suggested_slot(booking, user_input)
+        if reply:
+            return reply
+
     # ==================================================
     # SERVICE
     # ==================================================
     if booking["awaiting_field"] == "service":
-        matches = []
+        services = current_catalog().match_services(user_input)
 
-        for clinic in st.session_state.clinics:
-            for s in clinic.get("services", []):
-                if user_input.lower() in s["name"].lower():
+        matches = []
+        for service in services:
+            for clinic in service["clinics"]:
+                if clinic not in matches:
                     matches.append(clinic)
-                    break
 
         if not matches:
             return "❌ This service is currently unavailable."
 
-        booking["service"] = user_input
+        # One matching service → use its catalog name ('cleening' → 'Teeth Cleaning')
+        booking["service"] = services[0]["name"] if len(services) == 1 else user_input
 
         # Only ONE clinic → auto-select
         if len(matches) == 1:
             booking["clinic"] = matches[0]  # store clinic dict
             booking["awaiting_field"] = "date"
             return (
-                f"✅ **{user_input}** is available at **{matches[0]['name']}**.\n\n"
+                f"✅ **{booking['service']}** is available at **{matches[0]['name']}**.\n\n"
                 "What **date** would you prefer?"
             )
 
@@ -314,12 +369,15 @@ def handle_booking_flow(user_input: str):
     # CLINIC (only when multiple)
     # ==================================================
     if booking["awaiting_field"] == "clinic":
-        for clinic in booking.get("possible_clinics", []):
-            if clinic["name"].lower() == user_input.lower():
-                booking["clinic"] = clinic
-                booking.pop("possible_clinics", None)
-                booking["awaiting_field"] = "date"
-                return "Great 👍 What **date** would you prefer?"
+        clinic = current_catalog().match_clinic(
+            user_input,
+            booking.get("possible_clinics", [])
+        )
+        if clinic:
+            booking["clinic"] = clinic
+            booking.pop("possible_clinics", None)
+            booking["awaiting_field"] = "date"
+            return "Great 👍 What **date** would you prefer?"
 
         return "❌ Please choose a valid clinic from the list."
 
@@ -327,34 +385,85 @@ def handle_booking_flow(user_input: str):
     # DATE
     # ==================================================
     if booking["awaiting_field"] == "date":
-        if not is_valid_date(user_input):
+        day = parse_date(user_input)
+        if not is_valid_date(user_input) or day is None:
             return "❌ Please enter a valid date (DD-MM-YYYY / today / tomorrow)."
 
-        if is_sunday(user_input):
-            return "❌ Clinics are closed on Sundays. Please choose another date."
+        if is_past(day):
+            return "❌ That date has already passed. Please choose today or a later date."
 
-        booking["date"] = user_input
+        clinic = booking["clinic"]
+        if not is_clinic_open_on_date(user_input, clinic, booking["service"]):
+            return (
+                f"❌ {clinic['name']} is closed on {day.strftime('%A, %d-%m-%Y')}"
+                f"{' for ' + booking['service'] if booking['service'] else ''}. "
+                "Please choose another date." + suggest_slots(booking, day)
+            )
+
+        # Offer that day's first free times; fully booked → suggest other days
+        # (unknown hours give no slots, which doesn't mean fully booked)
+        suggestions = suggest_slots(booking, day)
+        if schedule_for(clinic).has_hours(booking["service"]) and not any(
+            slot["date"] == day and slot["clinic"] == clinic["name"]
+            for slot in booking["suggestions"]
+        ):
+            return (
+                f"❌ {clinic['name']} is fully booked on {day.strftime('%A, %d-%m-%Y')}. "
+                "Please choose another date." + suggestions
+            )
+
+        booking["date"] = day.strftime("%d-%m-%Y")
         booking["awaiting_field"] = "time"
-        return "What **time** works best for you?"
+        return "What **time** works best for you?" + suggestions
 
     # ==================================================
     # TIME
     # ==================================================
     if booking["awaiting_field"] == "time":
-        if not is_valid_time(user_input):
+        # YES keeps a time offered while the clinic's hours are unknown
+        unconfirmed = booking.get("unconfirmed_time")
+        booking["unconfirmed_time"] = None
+        confirmed = bool(unconfirmed) and user_input.lower() == "yes"
+        if confirmed:
+            user_input = unconfirmed
+
+        if not is_valid_time(user_input) or parse_clock(user_input) is None:
             return "❌ Please enter a valid time (e.g., 10 AM, 11:30 AM, 14:00)."
 
         clinic = booking["clinic"]  # clinic dict
 
-        if not is_time_within_clinic_hours(user_input, clinic):
+        # Same cut-off the suggestions use
+        if is_past(parse_date(booking["date"]), parse_clock(user_input)):
+            return (
+                "❌ That time has already passed. Please choose a later time."
+                + suggest_slots(booking, parse_date(booking["date"]))
+            )
+
+        if not schedule_for(clinic).has_hours(booking["service"]):
+            # Nothing to check against: let the user decide, don't assume open
+            if not confirmed:
+                booking["unconfirmed_time"] = user_input
+                return (
+                    f"⚠️ Hours not specified for {clinic['name']}, so I can't check "
+                    f"whether {format_clock(parse_clock(user_input))} works. "
+                    "Reply **YES** to keep this time, or enter another time."
+                )
+        elif not is_time_within_clinic_hours(user_input, clinic, booking["date"], booking["service"]):
+            hours = schedule_for(clinic).intervals_on(parse_date(booking["date"]), booking["service"])
             return (
                 f"❌ Selected time is outside working hours "
-                f"({clinic.get('open_time')} – {clinic.get('close_time')})."
+                f"({describe_intervals(hours)})."
+                + suggest_slots(booking, parse_date(booking["date"]))
+            )
+
+        if not is_slot_available(clinic["name"], booking["date"], user_input):
+            return (
+                "❌ That time slot is already booked. Please choose another time."
+                + suggest_slots(booking, parse_date(booking["date"]))
             )
 
-        booking["time"] = user_input
-        booking["awaiting_field"] = "name"
-        return "May I know your **full name**?"
+        booking["time"] = format_clock(parse_clock(user_input))
+        return after_slot_chosen(booking)
 
     # ==================================================
     # NAME
@@ -388,19 +497,7 @@ def handle_booking_flow(user_input: str):
         booking["phone"] = user_input
         booking["awaiting_field"] = "confirm"
 
-        return f"""
-✅ **Please confirm your booking details:**
-
-- **Service:** {booking['service']}
-- **Clinic:** {booking['clinic']['name']}
-- **Date:** {booking['date']}
-- **Time:** {booking['time']}
-- **Name:** {booking['name']}
-- **Email:** {booking['email']}
-- **Phone:** {booking['phone']}
-
-Reply **YES** to confirm or **NO** to cancel.
-"""
+        return format_booking_summary(booking)
 
     # ==================================================
     # CONFIRM
@@ -418,8 +515,14 @@ Reply **YES** to confirm or **NO** to cancel.
                 "phone": booking["phone"]
             }
 
-            save_booking_db(booking_data)
-
+            # Final conflict check + insert in one transaction
+            if save_booking_db(booking_data) is None:
+                booking["awaiting_field"] = "time"
+                return (
+                    "❌ Sorry, that time slot was just booked by someone else. "
+                    "Please choose another **time**."
+                    + suggest_slots(booking, parse_date(booking["date"]))
+                )
 
             try:
                 send_confirmation_email(booking_data)
@@ -440,19 +543,52 @@ Reply **YES** to confirm or **NO** to cancel.
     return "⚠️ Something went wrong. Let’s start again."
 
 
+def format_booking_summary(booking: dict) -> str:
+    return f"""
+✅ **Please confirm your booking details:**
+
+- **Service:** {booking['service']}
+- **Clinic:** {booking['clinic']['name']}
+- **Date:** {booking['date']}
+- **Time:** {booking['time']}
+- **Name:** {booking['name']}
+- **Email:** {booking['email']}
+- **Phone:** {booking['phone']}
+
+Reply **YES** to confirm or **NO** to cancel.
+"""
+
+
 
 # --------------------------------
 # LLM Response
 # --------------------------------
-def get_chat_response(chat_model, messages, system_prompt):
+def format_messages(messages, system_prompt):
     formatted = [SystemMessage(content=system_prompt)]
     for m in messages:
         if m["role"] == "user":
             formatted.append(HumanMessage(content=m["content"]))
         else:
             formatted.append(AIMessage(content=m["content"]))
-    response = chat_model.invoke(formatted)
-    return response.content
+    return formatted
+
+
+def get_chat_response(chat_model, messages, system_prompt):
+    # Identical in-flight prompts share one upstream call
+    return get_llm_executor().invoke(
+        chat_model,
+        format_messages(messages, system_prompt)
+    )
+
+
+def stream_chat_response(chat_model, messages, system_prompt):
+    """
+    Yield answer tokens as Groq produces them
+    """
+    yield from get_llm_executor().stream(
+        chat_model,
+        format_messages(messages, system_prompt)
+    )
 
 
 # --------------------------------
@@ -523,23 +659,7 @@ def bookings_page():
         mime="text/csv"
     )
 
-                    
-def is_service_available(service_name: str) -> bool:
-    if not service_name:
-        return False
 
-    clinics = st.session_state.get("clinics", [])
-    if not clinics:
-        return False
-
-    service_name = service_name.lower()
-
-    for clinic in clinics:
-        for service in clinic.get("services", []):
-            if service_name == service["name"].lower():
-                return True
-
-    return False
 
 def chat_page():
     st.title("🤖 AI Booking Assistant")
@@ -570,6 +690,8 @@ def chat_page():
     # -------------------------
     if prompt := st.chat_input("Type your message here..."):
         prompt_clean = prompt.strip().lower()
+        streamed = False
+        context_stats = None
 
         st.session_state.messages.append(
             {"role": "user", "content": prompt}
@@ -579,16 +701,22 @@ def chat_page():
         with st.chat_message("user"):
             st.markdown(prompt)
 
+        # One pass over the message; priority = INTENT_ROUTES order
+        intent = get_intent_router().route(prompt, guards={
+            "booking_flow": lambda text: st.session_state.booking["started"],
+            "unknown_service": lambda text: not is_service_available(text),
+        })
+
         # ==================================================
         # 1️⃣ GREETING
         # ==================================================
-        if prompt_clean in ["hi", "hello", "hey", "good morning", "good evening"]:
+        if intent == "greeting":
             response = "Hello 👋 How can I assist you today?"
 
         # ==================================================
         # 2️⃣ BOOKING INTENT (PDF REQUIRED)
         # ==================================================
-        elif detect_booking_intent(prompt):
+        elif intent == "booking":
             if "clinics" not in st.session_state or not st.session_state.clinics:
                 response = (
                     "📄 Please upload clinic PDF(s) first so I can verify "
@@ -605,13 +733,13 @@ def chat_page():
         # ==================================================
         # 3️⃣ BOOKING FLOW CONTINUATION
         # ==================================================
-        elif st.session_state.booking["started"]:
+        elif intent == "booking_flow":
             response = handle_booking_flow(prompt)
 
         # ==================================================
         # 4️⃣ WORKING HOURS (ONE OR ALL CLINICS)
         # ==================================================
-        elif is_working_hours_query(prompt_clean):
+        elif intent == "working_hours":
             if "clinics" not in st.session_state or not st.session_state.clinics:
                 response = (
                     "📄 Please upload clinic PDF(s) first so I can "
@@ -629,7 +757,7 @@ def chat_page():
         # ==================================================
         # 5️⃣ SERVICE LISTING (ONE OR ALL CLINICS)
         # ==================================================
-        elif is_service_list_query(prompt_clean):
+        elif intent == "service_list":
             if "clinics" not in st.session_state or not st.session_state.clinics:
                 response = (
                     "📄 Please upload clinic PDF(s) first so I can show "
@@ -647,38 +775,74 @@ def chat_page():
         # ==================================================
         # 6️⃣ INVALID SERVICE CHECK (ONLY WHEN SERVICE MENTIONED)
         # ==================================================
-        elif looks_like_service_query(prompt_clean) and not is_service_available(prompt):
+        elif intent == "unknown_service":
             response = "❌ Sorry, this service is not available at the clinic."
 
         # ==================================================
         # 7️⃣ STRICT RAG (PDF ONLY)
         # ==================================================
         else:
-            if "vector_store" not in st.session_state:
+            if st.session_state.get("vector_store") is None:
                 response = (
                     "📄 Please upload clinic PDF(s) from the sidebar "
                     "so I can answer your questions accurately."
                 )
             else:
-                context = retrieve_context(prompt)
+                kb_version = st.session_state.get("kb_version", "")
+                cached_answer = (
+                    get_cached_answer(prompt, kb_version)
+                    if ANSWER_CACHE_ENABLED else None
+                )
+                # Named clinic → search only its shard
+                mentioned_clinic = get_clinic_from_query(prompt_clean)
+                retrieval = None if cached_answer else retrieve_scored(
+                    prompt,
+                    clinic_name=mentioned_clinic["name"] if mentioned_clinic else None
+                )
+
+                # ⚡ Same (or paraphrased) question already answered on this KB
+                if cached_answer:
+                    response = cached_answer
 
-                system_prompt = f"""
+                # Nothing relevant retrieved → refuse locally, skip the LLM call
+                elif not retrieval["relevant"]:
+                    response = NO_INFO_RESPONSE
+                else:
+                    context = retrieval["context"]
+                    context_stats = retrieval["stats"]
+
+                    system_prompt = f"""
 You are a STRICT clinic information assistant.
 
 RULES:
 - Answer ONLY using the CONTEXT.
 - DO NOT add services, timings, prices, doctors, or assumptions.
 - If the answer is NOT present, reply EXACTLY:
-  "I’m sorry, I don’t have that information in the uploaded clinic documents."
+  "{NO_INFO_RESPONSE}"
 
 CONTEXT:
 {context}
 """
-                response = get_chat_response(
-                    chat_model,
-                    [{"role": "user", "content": prompt}],
-                    system_prompt
-                )
+                    if STREAM_RESPONSES:
+                        # Render tokens as they arrive; keep the full text
+                        with st.chat_message("assistant"):
+                            response = st.write_stream(
+                                stream_chat_response(
+                                    chat_model,
+                                    [{"role": "user", "content": prompt}],
+                                    system_prompt
+                                )
+                            )
+                        streamed = True
+                    else:
+                        response = get_chat_response(
+                            chat_model,
+                            [{"role": "user", "content": prompt}],
+                            system_prompt
+                        )
+
+                    if ANSWER_CACHE_ENABLED and response:
+                        save_cached_answer(prompt, kb_version, response)
 
         # -------------------------
         # Save + Display Assistant
@@ -688,8 +852,17 @@ CONTEXT:
         )
         save_chat(st.session_state.messages)
 
-        with st.chat_message("assistant"):
-            st.markdown(response)
+        if not streamed:
+            with st.chat_message("assistant"):
+                st.markdown(response)
+
+        # Token budget report for answers built from packed context
+        if context_stats:
+            st.caption(
+                f"Context: {context_stats['tokens_out']} tokens from "
+                f"{context_stats['chunks_out']}/{context_stats['chunks_in']} chunks "
+                f"({context_stats['tokens_saved']} tokens saved)"
+            )
 
     # -------------------------
     # DEBUG
@@ -702,37 +875,87 @@ CONTEXT:
 # --------------------------------
 
 PDF_DIR = "data/uploaded_pdfs"
-FAISS_DIR = "data/faiss_index"
-CLINICS_CACHE = "data/clinics.json"
 
 os.makedirs(PDF_DIR, exist_ok=True)
-os.makedirs(FAISS_DIR, exist_ok=True)
 
 
 # -------------------------
 # Helper: rebuild KB
 # -------------------------
 def rebuild_knowledge_base(pdf_paths):
-    # Remove FAISS index
-    if os.path.exists(FAISS_DIR):
-        import shutil
-        shutil.rmtree(FAISS_DIR)
+    # Nothing changed → don't queue a job on every rerun
+    if kb_matches(pdf_paths) and get_active_job() is None:
+        return
+
+    # Ingestion runs in the background worker; this session keeps
+    # answering from the current index until the new one is published
+    st.session_state.ingest_job = enqueue_ingest(pdf_paths)
 
-    # Rebuild only if PDFs exist
-    if pdf_paths:
-        st.session_state.vector_store = build_vector_store(pdf_paths)
 
-        clinics = extract_clinic_data_from_pdfs(pdf_paths)
-        with open(CLINICS_CACHE, "w") as f:
-            json.dump(clinics, f, indent=2)
+def sync_session_knowledge_base():
+    """
+    Point this session at the live index version (after a job published a
+    new one, in this or another session)
+    """
+    live_version = get_kb_version()
+
+    if (
+        "vector_store" in st.session_state
+        and "service_catalog" in st.session_state
+        and "schedules" in st.session_state
+        and st.session_state.get("kb_version") == live_version
+    ):
+        return
+
+    st.session_state.vector_store = load_vector_store()
+    st.session_state.clinics = get_clinics()
+    st.session_state.service_catalog = get_service_catalog(
+        st.session_state.clinics,
+        live_version
+    )
+    st.session_state.schedules = get_clinic_schedules(
+        st.session_state.clinics,
+        live_version
+    )
+    st.session_state.kb_version = live_version
+
+
+@st.fragment(run_every=INGEST_JOB_POLL_SECONDS)
+def show_ingest_progress():
+    job_id = st.session_state.get("ingest_job")
+    job = get_job(job_id) if job_id else get_active_job()
+    if job is None:
+        return
+
+    if job["status"] in ("queued", "running"):
+        st.progress(
+            job["progress"] or 0.0,
+            text=job["message"] or "Waiting for the indexing worker…"
+        )
+        return
 
-        st.session_state.clinics = clinics
+    # Finished → pick up the new index with a full rerun
+    st.session_state.pop("ingest_job", None)
+
+    if job["status"] == "failed":
+        st.error(f"Indexing failed: {job['message']}")
     else:
-        st.session_state.pop("vector_store", None)
-        st.session_state.pop("clinics", None)
+        st.rerun()
+
+
+def show_performance_stats():
+    """
+    Process-wide counters, for checking caches etc. are doing their job
+    """
+    with st.expander("⚙️ Performance stats"):
+        st.markdown("**Retrieval caches**")
+        st.json(get_cache_stats(), expanded=False)
 
-        if os.path.exists(CLINICS_CACHE):
-            os.remove(CLINICS_CACHE)
+        st.markdown("**LLM executor**")
+        st.json(dict(get_llm_executor().stats), expanded=False)
+
+        st.markdown("**Intent routing**")
+        st.json(get_intent_router().get_stats(), expanded=False)
 
 # -------------------------
 # Main
@@ -743,6 +966,16 @@ def main():
     # ----------------------------
     init_db()
 
+    # ----------------------------
+    # Load shared models once per process
+    # ----------------------------
+    warm_up()
+
+    # ----------------------------
+    # Claim jobs queued before a restart or left stale by a dead process
+    # ----------------------------
+    start_ingest_worker()
+
     st.set_page_config(
         page_title="AI Booking Assistant",
         page_icon="🤖",
@@ -757,7 +990,6 @@ def main():
 
         # Ensure directories exist
         os.makedirs(PDF_DIR, exist_ok=True)
-        os.makedirs(FAISS_DIR, exist_ok=True)
 
         # ----------------------------
         # Upload PDFs
@@ -771,13 +1003,19 @@ def main():
         if uploaded_files:
             for file in uploaded_files:
                 save_path = os.path.join(PDF_DIR, file.name)
-                if not os.path.exists(save_path):
+                data = file.getvalue()
+
+                # Overwrite only when the content actually changed
+                if (
+                    not os.path.exists(save_path)
+                    or hashlib.sha256(data).hexdigest() != file_sha256(save_path)
+                ):
                     with open(save_path, "wb") as f:
-                        f.write(file.read())
+                        f.write(data)
 
             st.success(f"{len(uploaded_files)} PDF(s) uploaded")
 
-            # 🔥 ALWAYS rebuild KB after upload
+            # 🔁 Sync KB (no-op when nothing changed)
             pdf_paths = [
                 os.path.join(PDF_DIR, f)
                 for f in os.listdir(PDF_DIR)
@@ -824,20 +1062,10 @@ def main():
             st.info("No PDFs uploaded yet.")
 
         # ----------------------------
-        # Load FAISS + Clinics on refresh (SAFE)
+        # Indexing progress + load FAISS / clinics (SAFE)
         # ----------------------------
-        if "vector_store" not in st.session_state:
-            if os.path.exists(os.path.join(FAISS_DIR, "index.faiss")):
-                st.session_state.vector_store = build_vector_store([])
-            else:
-                st.session_state.vector_store = None
-
-        if "clinics" not in st.session_state:
-            if os.path.exists(CLINICS_CACHE):
-                with open(CLINICS_CACHE, "r") as f:
-                    st.session_state.clinics = json.load(f)
-            else:
-                st.session_state.clinics = []
+        show_ingest_progress()
+        sync_session_knowledge_base()
 
         st.divider()
 
@@ -856,6 +1084,9 @@ def main():
                 save_chat([])
                 st.rerun()
 
+        st.divider()
+        show_performance_stats()
+
     # ================================
     # PAGE ROUTING
     # ================================
@@ -0,0 +1,27 @@
+import asyncio
+
+
+class _Chunk:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeClinicLLM:
+    """
+    Local stand-in for ChatGroq: echoes the first context line token by token
+    """
+
+    model_name = "fake-clinic-llm"
+
+    def __init__(self, token_delay: float = 0.0):
+        self.token_delay = token_delay
+
+    async def astream(self, messages):
+        system_prompt = messages[0].content
+        context = system_prompt.split("CONTEXT:", 1)[-1].strip()
+        answer = context.splitlines()[0] if context else "I don't know."
+
+        for token in answer.split(" "):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield _Chunk(token + " ")
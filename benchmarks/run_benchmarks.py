@@ -0,0 +1,184 @@
+"""
+Retrieval / answer benchmarks on synthetic clinic corpora.
+
+    python -m benchmarks.run_benchmarks --scales 10,100,500 --index-types flat,hnsw,ivf
+    python -m benchmarks.run_benchmarks --out bench_results.json
+
+Groq is replaced by a local fake LLM, so numbers only cover our own code.
+Chunk embeddings are cached in a throwaway DB per scale (never the app's
+data/embedding_cache.db): ingestion is timed cold, then again warm.
+"""
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+import utils.embedding_cache as embedding_cache
+from benchmarks.fake_llm import FakeClinicLLM
+from benchmarks.synthetic_corpus import generate_corpus
+from models.embeddings import get_embedding_model_id
+from utils.faiss_index import all_vectors, build_index, index_type_of
+from utils.llm_executor import LLMExecutor
+from utils.rag_pipeline import (
+    QUERY_EMBEDDING_CACHE,
+    RESULT_CACHE,
+    RETRIEVAL_STATS,
+    add_chunks,
+    retrieve,
+    split_pages,
+)
+from utils.vector_io import save_store
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(path, name))
+        for name in os.listdir(path)
+    )
+
+
+def ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def ingest(corpus: list):
+    """
+    split + embed + index → (vector_store, chunks, seconds)
+    """
+    start = time.perf_counter()
+    chunks, ids = [], []
+    for clinic_no, clinic in enumerate(corpus):
+        clinic_chunks = split_pages(clinic["pages"])
+        chunks.extend(clinic_chunks)
+        ids.extend(f"bench{clinic_no}-{i}" for i in range(len(clinic_chunks)))
+
+    vector_store = add_chunks(None, chunks, ids)
+    return vector_store, chunks, time.perf_counter() - start
+
+
+def bench_scale(n_clinics: int, index_types: list, k: int, answer_samples: int) -> list:
+    corpus = generate_corpus(n_clinics)
+    questions = [q for clinic in corpus for q in clinic["questions"]]
+
+    # ---------------------------
+    # Ingestion: empty embedding cache, then every chunk cached
+    # ---------------------------
+    production_db = embedding_cache.EMBEDDING_CACHE_DB
+    with tempfile.TemporaryDirectory() as tmp:
+        embedding_cache.EMBEDDING_CACHE_DB = os.path.join(tmp, "embedding_cache.db")
+        try:
+            vector_store, chunks, ingest_cold_seconds = ingest(corpus)
+            _, _, ingest_warm_seconds = ingest(corpus)
+        finally:
+            embedding_cache.EMBEDDING_CACHE_DB = production_db
+
+    exact_vectors = all_vectors(vector_store.index)
+    executor = LLMExecutor()
+    llm = FakeClinicLLM()
+    results = []
+
+    for index_type in index_types:
+        start = time.perf_counter()
+        vector_store.index = build_index(exact_vectors, index_type)
+        index_build_seconds = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp:
+            save_store(vector_store, tmp)
+            index_bytes = dir_size(tmp)
+
+        # Cold caches so every index type pays for its own searches
+        RESULT_CACHE.clear()
+        QUERY_EMBEDDING_CACHE.clear()
+        fast_path_before = RETRIEVAL_STATS["lexical_fast_path"]
+
+        latencies = []
+        hits = 0
+        contexts = []
+        for q in questions:
+            start = time.perf_counter()
+            result = retrieve(q["question"], vector_store, k)
+            latencies.append(time.perf_counter() - start)
+
+            hits += q["fact"] in result["context"]
+            contexts.append(result["context"])
+
+        # Retrieval + (fake) LLM through the real executor
+        answer_latencies = []
+        for q, context in list(zip(questions, contexts))[:answer_samples]:
+            messages = [
+                SystemMessage(content=f"CONTEXT:\n{context}"),
+                HumanMessage(content=q["question"]),
+            ]
+            start = time.perf_counter()
+            executor.invoke(llm, messages)
+            answer_latencies.append(time.perf_counter() - start)
+
+        results.append({
+            "clinics": n_clinics,
+            "chunks": len(chunks),
+            "index_type": index_type_of(vector_store.index),
+            "requested_index_type": index_type,
+            "k": k,
+            "ingest_cold_s": round(ingest_cold_seconds, 3),
+            "ingest_warm_s": round(ingest_warm_seconds, 3),
+            "index_build_s": round(index_build_seconds, 3),
+            "index_bytes": index_bytes,
+            "queries": len(questions),
+            f"recall@{k}": round(hits / len(questions), 4),
+            "query_p50_ms": ms(percentile(latencies, 50)),
+            "query_p95_ms": ms(percentile(latencies, 95)),
+            "query_p99_ms": ms(percentile(latencies, 99)),
+            "lexical_fast_path": RETRIEVAL_STATS["lexical_fast_path"] - fast_path_before,
+            "answer_p50_ms": ms(percentile(answer_latencies, 50)),
+            "answer_p95_ms": ms(percentile(answer_latencies, 95)),
+        })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="10,100,500", help="clinic counts")
+    parser.add_argument("--index-types", default="flat,hnsw,ivf")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--answer-samples", type=int, default=20)
+    parser.add_argument("--out", help="also write results JSON here")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "embedding_model": get_embedding_model_id(),
+        },
+        "results": [],
+    }
+
+    for scale in (int(s) for s in args.scales.split(",")):
+        report["results"].extend(
+            bench_scale(scale, args.index_types.split(","), args.k, args.answer_samples)
+        )
+
+    output = json.dumps(report, indent=2)
+    print(output)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import random
+
+SERVICES = [
+    "General Consultation", "Root Canal Treatment", "Teeth Cleaning",
+    "Dental Implant", "Physiotherapy Session", "Eye Checkup",
+    "Skin Care Therapy", "Blood Test Package", "Child Vaccination",
+    "Diabetes Checkup", "Orthodontic Braces", "Hearing Test",
+]
+FIRST_NAMES = ["Asha", "Ravi", "Meera", "Kiran", "Anil", "Priya", "Vikram", "Sneha"]
+LAST_NAMES = ["Rao", "Sharma", "Iyer", "Reddy", "Menon", "Gupta", "Nair", "Das"]
+AREAS = ["Banjara Hills", "Indiranagar", "Andheri", "Salt Lake", "Anna Nagar", "Kothrud"]
+FILLER = (
+    "Our team follows strict hygiene protocols and every patient receives a "
+    "written treatment plan. Please carry previous prescriptions and reports. "
+)
+
+
+def generate_clinic(clinic_id: int, rng: random.Random) -> dict:
+    """
+    One synthetic clinic brochure as pages + labeled questions.
+
+    Every question carries a fact string that must appear in a retrieved
+    chunk for the retrieval to count as a hit.
+    """
+    name = f"{rng.choice(AREAS)} Care Clinic {clinic_id}"
+    doctor = f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    parking = f"Parking for {name} is at basement level B{rng.randint(1, 4)} gate {clinic_id}"
+    emergency = f"Emergency line for {name} is 98{clinic_id:08d}"
+    services = rng.sample(SERVICES, 6)
+    prices = {service: rng.randrange(300, 9000, 50) for service in services}
+
+    pages = [
+        "\n".join([
+            f"Clinic Name: {name}",
+            "Monday to Saturday: 9:00 AM – 6:00 PM",
+            "Closed on Sunday",
+            f"Chief doctor: {doctor}",
+            FILLER * 3,
+        ]),
+        "\n".join(
+            ["Services & Pricing"]
+            + [f"- {service} – ₹{price}" for service, price in prices.items()]
+            + [FILLER * 2]
+        ),
+        "\n".join([parking + ".", emergency + ".", FILLER * 4]),
+    ]
+
+    service = services[0]
+    questions = [
+        {"question": f"Where can I park at {name}?", "fact": parking},
+        {"question": f"What is the emergency number of {name}?", "fact": emergency},
+        {"question": f"How much does {service} cost at {name}?", "fact": f"{service} – ₹{prices[service]}"},
+        {"question": f"Who is the chief doctor at {name}?", "fact": doctor},
+    ]
+
+    return {
+        "name": name,
+        "pages": [
+            {"text": text, "metadata": {"source": f"synthetic/{clinic_id}.pdf", "page": i}}
+            for i, text in enumerate(pages)
+        ],
+        "questions": questions,
+    }
+
+
+def generate_corpus(n_clinics: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [generate_clinic(i, rng) for i in range(1, n_clinics + 1)]
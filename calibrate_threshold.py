@@ -0,0 +1,30 @@
+import json
+import sys
+
+from utils.rag_pipeline import load_vector_store, retrieve
+from utils.relevance import calibrate_threshold, save_relevance_threshold
+
+# Usage: python calibrate_threshold.py labeled.jsonl
+# Each line: {"question": "...", "answerable": true|false}
+if len(sys.argv) != 2:
+    print("Usage: python calibrate_threshold.py labeled.jsonl")
+    sys.exit(1)
+
+vector_store = load_vector_store()
+if vector_store is None:
+    print("No FAISS index found. Upload PDFs first.")
+    sys.exit(1)
+
+samples = []
+with open(sys.argv[1], "r", encoding="utf-8") as f:
+    for line in f:
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        result = retrieve(row["question"], vector_store)
+        samples.append((result["score"], bool(row["answerable"])))
+
+report = calibrate_threshold(samples)
+save_relevance_threshold(report)
+
+print(json.dumps(report, indent=2))
@@ -0,0 +1,15 @@
+import sys
+
+from models.embeddings import check_backend_parity
+
+# Usage: python check_embeddings.py [onnx|onnx-int8]
+backend = sys.argv[1] if len(sys.argv) > 1 else "onnx-int8"
+report = check_backend_parity(backend)
+
+print(report)
+
+if report["dimensions"][0] != report["dimensions"][1] or report["min_cosine"] < 0.99:
+    print("PARITY FAILED")
+    sys.exit(1)
+
+print("PARITY OK")
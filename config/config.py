@@ -2,8 +2,91 @@ import os
 
 # LLM Configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL_NAME = "mixtral-8x7b-32768"
+GROQ_MODEL_NAME = os.getenv("GROQ_MODEL_NAME", "llama-3.1-8b-instant")
+LLM_TEMPERATURE = 0.3
+
+# Embedding Configuration
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DEVICE = "cpu"
+# "torch" (sentence-transformers) | "onnx" | "onnx-int8" (ONNX Runtime, no torch)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_FILES = {
+    "onnx": "onnx/model.onnx",
+    "onnx-int8": "onnx/model_quint8_avx2.onnx",
+}
+EMBEDDING_MAX_LENGTH = 256
 
 # App Configuration
 APP_NAME = "AI Booking Assistant"
 MAX_CHAT_HISTORY = 25
+
+# Ingestion Configuration (1 worker = serial path)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+# Retrieval Configuration
+RAG_TOP_K = 3
+HYBRID_SEARCH = True
+LEXICAL_FAST_PATH = True
+LEXICAL_FAST_PATH_RATIO = 1.5   # top BM25 score must beat the runner-up by this
+
+# FAISS Index Configuration
+# "auto" | "flat" | "hnsw" | "ivf" | "ivfpq"
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "auto")
+FAISS_AUTO_HNSW_AT = 20_000      # auto: flat below, HNSW from here
+FAISS_AUTO_IVFPQ_AT = 200_000    # auto: IVF-PQ from here
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+IVF_NPROBE = 16
+IVFPQ_SUBQUANTIZERS = 48         # must divide the embedding dimension (384)
+
+# Chat Configuration
+STREAM_RESPONSES = True
+CONTEXT_TOKEN_BUDGET = 600       # max prompt tokens spent on retrieved context
+CONTEXT_CANDIDATES = 8           # chunks fetched before packing
+CONTEXT_MMR_LAMBDA = 0.7         # 1.0 = pure relevance, 0.0 = pure diversity
+CONTEXT_DUPLICATE_THRESHOLD = 0.8
+
+# Relevance Threshold (overridden by data/relevance_threshold.json once calibrated)
+RAG_MIN_SCORE = 0.3
+RAG_MIN_ANSWERABLE_RECALL = 0.98   # calibration keeps this share of answerable questions
+
+# Answer Cache (strict-RAG responses)
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_MAX_ENTRIES = 2000
+ANSWER_CACHE_SEMANTIC = True        # also match paraphrases by embedding
+ANSWER_CACHE_SIMILARITY = 0.95      # min cosine for a paraphrase hit
+
+# LLM Execution
+LLM_MAX_CONCURRENCY = 4     # upstream calls in flight per process
+LLM_TIMEOUT = 30            # seconds to wait for the next token
+LLM_RETRIES = 2
+LLM_BACKOFF = 0.5           # seconds, doubled per retry (with jitter)
+
+# Per-clinic index shards (a global index is always kept too)
+SHARD_BY_CLINIC = True
+
+# Persistent chunk-embedding cache (keyed by text hash + model id)
+EMBEDDING_CACHE_ENABLED = True
+
+# Background ingestion jobs
+INGEST_JOB_POLL_SECONDS = 2     # UI refresh interval while a job runs
+INGEST_JOB_STALE_SECONDS = 300  # running job with no heartbeat → failed
+
+# Service catalog matching
+SERVICE_MATCH_MIN = 0.6     # share of the shorter side's words that must match
+SERVICE_FUZZY_MIN = 0.55    # trigram Dice similarity for a typo'd word
+
+# Booking slots
+SLOT_MINUTES = 30           # length of one appointment
+SLOT_CAPACITY = 1           # overlapping bookings a clinic can take
+CLINIC_SLOT_CAPACITY = {}   # clinic name → capacity override
+SLOT_SEARCH_DAYS = 14       # how far ahead free slots are suggested
+SLOT_SUGGESTIONS = 3        # free slots offered when a choice fails
+
+# SQLite (clinic.db)
+DB_POOL_SIZE = 8            # idle connections kept per process
+DB_BUSY_TIMEOUT = 5.0       # seconds a writer waits for the lock
+DB_STATEMENT_CACHE = 256    # prepared statements cached per connection
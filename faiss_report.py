@@ -0,0 +1,35 @@
+import json
+import sys
+
+import numpy as np
+
+from utils.rag_pipeline import load_vector_store, embed_texts
+from utils.faiss_index import recall_latency_report
+
+# Usage: python faiss_report.py ["question 1" "question 2" ...]
+DEFAULT_QUERIES = [
+    "What are the working hours?",
+    "How much does a root canal cost?",
+    "Is there parking near the clinic?",
+    "Which doctors are available?",
+    "What is the consultation fee?",
+    "Is the clinic open on Sunday?",
+]
+
+vector_store = load_vector_store()
+if vector_store is None:
+    print("No FAISS index found. Upload PDFs first.")
+    sys.exit(1)
+
+queries = sys.argv[1:] or DEFAULT_QUERIES
+
+# Exact baseline: re-embed every chunk in index order
+texts = [
+    vector_store.docstore.search(doc_id).page_content
+    for _, doc_id in sorted(vector_store.index_to_docstore_id.items())
+]
+exact_vectors = np.array(embed_texts(texts), dtype=np.float32)
+query_vectors = np.array(embed_texts(queries), dtype=np.float32)
+
+report = recall_latency_report(vector_store.index, exact_vectors, query_vectors)
+print(json.dumps(report, indent=2))
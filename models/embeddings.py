@@ -1,12 +1,133 @@
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+
+from config.config import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_DEVICE,
+    EMBEDDING_BACKEND,
+    EMBEDDING_ONNX_FILES,
+    EMBEDDING_MAX_LENGTH,
+)
+from models.registry import get_resource
+
+PARITY_SAMPLE = [
+    "What are the clinic working hours?",
+    "Root canal treatment – ₹2500",
+    "Is parking available near the clinic?",
+    "Which doctors are available on Saturday?",
+    "Consultation fee is ₹500 for new patients.",
+]
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    MiniLM on ONNX Runtime: mean pooling + L2 norm, same as sentence-transformers
+    """
+
+    def __init__(self, model_name: str, onnx_file: str, max_length: int = 256):
+        try:
+            import numpy as np
+            import onnxruntime as ort
+            from huggingface_hub import hf_hub_download
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError(
+                f"ONNX embedding backend needs onnxruntime and tokenizers: {str(e)}"
+            )
+
+        self._np = np
+        self.session = ort.InferenceSession(
+            hf_hub_download(model_name, onnx_file),
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(model_name, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+    def _encode(self, texts: list) -> list:
+        np = self._np
+        encoded = self.tokenizer.encode_batch(texts)
+
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+
+        hidden = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, then normalize
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+        return pooled.tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        return self._encode(texts) if texts else []
+
+    def embed_query(self, text: str) -> list:
+        return self._encode([text])[0]
+
+
+def _build_torch_model():
+    from langchain_community.embeddings import HuggingFaceEmbeddings
 
-def get_embedding_model():
     return HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
+        model_name=EMBEDDING_MODEL_NAME,
         model_kwargs={
-            "device": "cpu"   # ✅ prevents meta-tensor crash
+            "device": EMBEDDING_DEVICE   # ✅ prevents meta-tensor crash
         },
         encode_kwargs={
             "normalize_embeddings": True
         }
     )
+
+
+def build_embedding_model(backend: str = EMBEDDING_BACKEND):
+    if backend == "torch":
+        return _build_torch_model()
+
+    if backend not in EMBEDDING_ONNX_FILES:
+        raise RuntimeError(f"Unknown embedding backend: {backend}")
+
+    return OnnxEmbeddings(
+        EMBEDDING_MODEL_NAME,
+        EMBEDDING_ONNX_FILES[backend],
+        EMBEDDING_MAX_LENGTH
+    )
+
+
+def get_embedding_model_id() -> str:
+    return f"{EMBEDDING_MODEL_NAME}:{EMBEDDING_BACKEND}"
+
+
+def get_embedding_model():
+    # Loaded once per process and shared across sessions / reruns
+    return get_resource(
+        "embeddings",
+        build_embedding_model,
+        (EMBEDDING_MODEL_NAME, EMBEDDING_DEVICE, EMBEDDING_BACKEND)
+    )
+
+
+def check_backend_parity(backend: str = EMBEDDING_BACKEND, texts: list = None) -> dict:
+    """
+    Compare a backend's vectors with the torch reference (cosine per text)
+    """
+    texts = texts or PARITY_SAMPLE
+    reference = _build_torch_model().embed_documents(texts)
+    candidate = build_embedding_model(backend).embed_documents(texts)
+
+    cosines = [
+        sum(a * b for a, b in zip(ref, cand))
+        for ref, cand in zip(reference, candidate)
+    ]
+
+    return {
+        "backend": backend,
+        "dimensions": (len(reference[0]), len(candidate[0])),
+        "min_cosine": min(cosines),
+        "mean_cosine": sum(cosines) / len(cosines),
+    }
@@ -1,23 +1,30 @@
 import os
 from langchain_groq import ChatGroq
 
+from config.config import GROQ_MODEL_NAME, LLM_TEMPERATURE
+from models.registry import get_resource
+
 
 def get_chatgroq_model():
     """
-    Initialize and return Groq chat model
+    Initialize and return Groq chat model (cached per process)
     """
 
     api_key = os.getenv("GROQ_API_KEY")
-    model_name = "llama-3.1-8b-instant"
+    model_name = GROQ_MODEL_NAME
 
     if not api_key:
         raise RuntimeError("GROQ_API_KEY is not set in environment variables.")
 
-    try:
-        return ChatGroq(
-            api_key=api_key,
-            model=model_name,
-            temperature=0.3
-        )
-    except Exception as e:
-        raise RuntimeError(f"Failed to initialize Groq model: {str(e)}")
+    def build():
+        try:
+            return ChatGroq(
+                api_key=api_key,
+                model=model_name,
+                temperature=LLM_TEMPERATURE
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to initialize Groq model: {str(e)}")
+
+    # A rotated key or model change rebuilds the client
+    return get_resource("llm", build, (api_key, model_name, LLM_TEMPERATURE))
@@ -0,0 +1,48 @@
+import threading
+
+# name → (config_key, resource); shared by every Streamlit session in the process
+_resources = {}
+_lock = threading.Lock()
+# name → lock held while that resource's factory runs
+_build_locks = {}
+
+
+def _build_lock(name: str):
+    with _lock:
+        return _build_locks.setdefault(name, threading.RLock())
+
+
+def get_resource(name: str, factory, config_key=()):
+    """
+    Return the process-wide resource for name.
+
+    factory() runs once per process, and again only when config_key changes.
+    Only builds of the same name wait on each other, so a factory may itself
+    call get_resource (the vector store loads the embedding model).
+    """
+    entry = _resources.get(name)
+    if entry is not None and entry[0] == config_key:
+        return entry[1]
+
+    with _build_lock(name):
+        entry = _resources.get(name)
+        if entry is not None and entry[0] == config_key:
+            return entry[1]
+
+        resource = factory()
+        _resources[name] = (config_key, resource)
+        return resource
+
+
+def warm_up():
+    """
+    Load heavy models up front so the first chat message doesn't pay for it
+    """
+    import os
+    from models.embeddings import get_embedding_model
+    from models.llm import get_chatgroq_model
+
+    get_embedding_model()
+
+    if os.getenv("GROQ_API_KEY"):
+        get_chatgroq_model()
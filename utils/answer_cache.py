@@ -0,0 +1,208 @@
+# utils/answer_cache.py
+import sqlite3
+import threading
+import time
+from array import array
+
+import numpy as np
+
+from config.config import (
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_SEMANTIC,
+    ANSWER_CACHE_SIMILARITY,
+)
+from utils.query_cache import normalize_query
+
+CACHE_DB_PATH = "data/answer_cache.db"
+
+# One connection per process, plus the current KB version's question
+# embeddings as a float32 matrix so a paraphrase lookup is one matmul
+_lock = threading.Lock()
+_conn = None
+_vectors = {"kb_version": None, "signature": None, "keys": [], "matrix": None}
+
+
+def get_cache_connection():
+    """
+    The process's cache connection (schema created on first use);
+    callers hold _lock while using it
+    """
+    global _conn
+    if _conn is None:
+        _conn = _connect()
+    return _conn
+
+
+def _connect():
+    conn = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS answer_cache (
+        kb_version TEXT NOT NULL,
+        question TEXT NOT NULL,
+        answer TEXT NOT NULL,
+        embedding BLOB,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        hits INTEGER DEFAULT 0,
+        PRIMARY KEY (kb_version, question)
+    )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_answer_cache_last_used "
+        "ON answer_cache (last_used)"
+    )
+    conn.commit()
+    return conn
+
+
+def _pack(vector) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _embed(question: str):
+    from utils.rag_pipeline import embed_query_cached
+    return embed_query_cached(question)
+
+
+def _signature(conn, kb_version: str):
+    # Changes whenever any process adds, replaces or evicts an embedded row
+    return conn.execute(
+        "SELECT COUNT(*), MAX(created_at) FROM answer_cache "
+        "WHERE kb_version = ? AND embedding IS NOT NULL",
+        (kb_version,)
+    ).fetchone()
+
+
+def _current_vectors(conn, kb_version: str) -> dict:
+    """
+    In-memory embeddings for kb_version, reloaded only when the table changed
+    """
+    signature = _signature(conn, kb_version)
+    if _vectors["kb_version"] == kb_version and _vectors["signature"] == signature:
+        return _vectors
+
+    rows = conn.execute(
+        "SELECT question, embedding FROM answer_cache "
+        "WHERE kb_version = ? AND embedding IS NOT NULL",
+        (kb_version,)
+    ).fetchall()
+
+    _vectors.update(
+        kb_version=kb_version,
+        signature=signature,
+        keys=[key for key, _ in rows],
+        matrix=np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32)
+        .reshape(len(rows), -1) if rows else None,
+    )
+    return _vectors
+
+
+def _remember_vector(kb_version: str, key: str, vector, evicted: set, signature):
+    """
+    Apply our own save to the in-memory matrix instead of reloading it
+    """
+    if _vectors["kb_version"] != kb_version or _vectors["signature"] is None:
+        return
+
+    keep = [i for i, k in enumerate(_vectors["keys"]) if k != key and k not in evicted]
+    keys = [_vectors["keys"][i] for i in keep]
+    matrix = _vectors["matrix"][keep] if keep else None
+
+    if key not in evicted:
+        row = np.asarray(vector, dtype=np.float32)[None, :]
+        keys.append(key)
+        matrix = row if matrix is None else np.vstack([matrix, row])
+
+    _vectors.update(keys=keys, matrix=matrix, signature=signature)
+
+
+def _best_paraphrase(conn, kb_version: str, query_vector):
+    vectors = _current_vectors(conn, kb_version)
+    if vectors["matrix"] is None:
+        return None
+
+    scores = vectors["matrix"] @ np.asarray(query_vector, dtype=np.float32)
+    best = int(np.argmax(scores))
+    return vectors["keys"][best] if scores[best] >= ANSWER_CACHE_SIMILARITY else None
+
+
+def get_cached_answer(question: str, kb_version: str):
+    """
+    Exact (normalized) match first, then paraphrase match by embedding
+    """
+    key = normalize_query(question)
+
+    with _lock:
+        conn = get_cache_connection()
+        row = conn.execute(
+            "SELECT answer FROM answer_cache WHERE kb_version = ? AND question = ?",
+            (kb_version, key)
+        ).fetchone()
+    match_key = key if row else None
+
+    if row is None and ANSWER_CACHE_SEMANTIC:
+        query_vector = _embed(question)
+
+        with _lock:
+            conn = get_cache_connection()
+            match_key = _best_paraphrase(conn, kb_version, query_vector)
+            if match_key is not None:
+                # Evicted by another process since the matrix was loaded → miss
+                row = conn.execute(
+                    "SELECT answer FROM answer_cache WHERE kb_version = ? AND question = ?",
+                    (kb_version, match_key)
+                ).fetchone()
+
+    if row is None:
+        return None
+
+    with _lock:
+        conn = get_cache_connection()
+        conn.execute(
+            "UPDATE answer_cache SET last_used = ?, hits = hits + 1 "
+            "WHERE kb_version = ? AND question = ?",
+            (time.time(), kb_version, match_key)
+        )
+        conn.commit()
+    return row[0]
+
+
+def save_cached_answer(question: str, kb_version: str, answer: str):
+    key = normalize_query(question)
+    vector = _embed(question) if ANSWER_CACHE_SEMANTIC else None
+    embedding = _pack(vector) if vector is not None else None
+    now = time.time()
+
+    with _lock:
+        conn = get_cache_connection()
+        conn.execute("""
+            INSERT OR REPLACE INTO answer_cache
+                (kb_version, question, answer, embedding, created_at, last_used, hits)
+            VALUES (?, ?, ?, ?, ?, ?, 0)
+        """, (kb_version, key, answer, embedding, now, now))
+
+        # Size-bounded: evict least recently used rows
+        evicted = {
+            question for version, question in conn.execute("""
+                DELETE FROM answer_cache WHERE rowid IN (
+                    SELECT rowid FROM answer_cache
+                    ORDER BY last_used DESC
+                    LIMIT -1 OFFSET ?
+                )
+                RETURNING kb_version, question
+            """, (ANSWER_CACHE_MAX_ENTRIES,)).fetchall()
+            if version == kb_version
+        }
+        signature = _signature(conn, kb_version)
+        conn.commit()
+
+        if vector is not None:
+            _remember_vector(kb_version, key, vector, evicted, signature)
+
+
+def clear_answer_cache():
+    with _lock:
+        conn = get_cache_connection()
+        conn.execute("DELETE FROM answer_cache")
+        conn.commit()
+        _vectors.update(kb_version=None, signature=None, keys=[], matrix=None)
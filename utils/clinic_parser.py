@@ -1,70 +1,172 @@
 import re
-from langchain_community.document_loaders import PyPDFLoader
+from utils.clinic_schedule import (
+    DAY,
+    DATE,
+    TIME_RANGE,
+    DAY_NAMES,
+    DATE_PATTERN,
+    parse_date,
+    parse_days,
+    parse_time_ranges,
+)
 
+NAME_PATTERN = re.compile(r"(Clinic Name|Clinic)\s*[:\-]\s*(.+)", re.IGNORECASE)
+HOURS_PATTERN = re.compile(
+    r"Monday\s*to\s*Saturday\s*[:\-]?\s*"
+    r"(\d{1,2}[:\.]\d{2}\s*(AM|PM))\s*[–\-]\s*"
+    r"(\d{1,2}[:\.]\d{2}\s*(AM|PM))",
+    re.IGNORECASE
+)
+# 'Monday to Friday: 9:00 AM – 1:00 PM, 4:00 PM – 8:00 PM', 'Saturday - 10 AM to 2 PM'
+DAY_HOURS_PATTERN = re.compile(
+    rf"(?P<days>{DAY}(?:\s*(?:to|and|[–\-,&/])\s*{DAY})*)\s*[:\-–,]?\s*"
+    rf"(?P<ranges>{TIME_RANGE}(?:\s*(?:and|[,&/])\s*{TIME_RANGE})*)",
+    re.IGNORECASE
+)
+CLOSED_DAYS_PATTERN = re.compile(
+    rf"Closed\s+on\s+(?P<days>{DAY}(?:\s*(?:and|[,&])\s*{DAY})*)",
+    re.IGNORECASE
+)
+HOLIDAYS_PATTERN = re.compile(
+    rf"(?:Holidays?|Closed\s+on)\s*[:\-]?\s*(?P<dates>(?:{DATE})(?:\s*(?:and|[,&])\s*(?:{DATE}))*)",
+    re.IGNORECASE
+)
+# Anything after the price on the line may carry per-service hours
+SERVICE_PATTERN = re.compile(r"[-•\d]+\s*(.+?)\s*[–\-]\s*₹\s*(\d+)([^\n]*)")
 
-def extract_clinic_data_from_pdfs(pdf_paths: list):
-    clinics = []
+# Text kept between pages so a match can straddle a page break
+CARRY_CHARS = 256
 
-    for path in pdf_paths:
-        loader = PyPDFLoader(path)
-        pages = loader.load()
 
-        full_text = "\n".join(p.page_content for p in pages)
+def parse_service_hours(rest: str) -> list:
+    """
+    ' (Mon to Fri, 10 AM – 1 PM)' → [{"days": [0..4], "intervals": [[600, 780]]}]
+    """
+    match = DAY_HOURS_PATTERN.search(rest)
+    if match:
+        return [{
+            "days": parse_days(match.group("days")),
+            "intervals": parse_time_ranges(match.group("ranges")),
+        }]
 
-        clinic = {
+    intervals = parse_time_ranges(rest)
+    if intervals:
+        return [{"days": list(range(7)), "intervals": intervals}]
+
+    return []
+
+
+class ClinicTextParser:
+    """
+    Incremental clinic extractor: feed page texts in order, then close().
+
+    Same result as running the patterns over the pages joined with "\\n",
+    but only the last lines (at least CARRY_CHARS) are held between pages. A match is taken
+    once it starts before that tail; later ones wait for the next page.
+    """
+
+    def __init__(self):
+        self.clinic = {
             "name": None,
             "open_time": None,
             "close_time": None,
             "closed_days": [],
+            "hours": [],
+            "holidays": [],
             "services": []
         }
+        self.buffer = ""
+        self.started = False
+        self.positions = {}  # pattern → offset before which matches are taken
+
+    def feed(self, text: str):
+        self.buffer = f"{self.buffer}\n{text}" if self.started else text
+        self.started = True
+        self._scan(final=False)
+
+    def close(self) -> dict:
+        self._scan(final=True)
+        self.buffer = ""
+        return self.clinic
+
+    def _matches(self, pattern, cut: int, final: bool):
+        """
+        Settled, not yet seen matches of pattern in the buffer
+        """
+        for match in pattern.finditer(self.buffer, self.positions.get(pattern, 0)):
+            if not final and match.start() >= cut:
+                break
+            self.positions[pattern] = match.end()
+            yield match
+
+    def _scan(self, final: bool):
+        buffer = self.buffer
+        if final:
+            cut = len(buffer)
+        else:
+            # Carry whole lines so line-level checks still see the line start
+            cut = buffer.rfind("\n", 0, max(0, len(buffer) - CARRY_CHARS)) + 1
+
+        def settled(match):
+            return match is not None and (final or match.start() < cut)
 
         # ---------------------------
         # Clinic Name
         # ---------------------------
-        name_match = re.search(
-            r"(Clinic Name|Clinic)\s*[:\-]\s*(.+)",
-            full_text,
-            re.IGNORECASE
-        )
-        if name_match:
-            clinic["name"] = name_match.group(2).strip()
+        if self.clinic["name"] is None:
+            name_match = NAME_PATTERN.search(buffer)
+            if settled(name_match):
+                self.clinic["name"] = name_match.group(2).strip()
 
         # ---------------------------
         # Working Hours (ROBUST)
         # ---------------------------
-        hours_match = re.search(
-            r"Monday\s*to\s*Saturday\s*[:\-]?\s*"
-            r"(\d{1,2}[:\.]\d{2}\s*(AM|PM))\s*[–\-]\s*"
-            r"(\d{1,2}[:\.]\d{2}\s*(AM|PM))",
-            full_text,
-            re.IGNORECASE
-        )
-
-        if hours_match:
-            clinic["open_time"] = hours_match.group(1)
-            clinic["close_time"] = hours_match.group(3)
+        if self.clinic["open_time"] is None:
+            hours_match = HOURS_PATTERN.search(buffer)
+            if settled(hours_match):
+                self.clinic["open_time"] = hours_match.group(1)
+                self.clinic["close_time"] = hours_match.group(3)
+
+        # Per-weekday hours, split shifts included (not service lines)
+        for match in self._matches(DAY_HOURS_PATTERN, cut, final):
+            line_start = buffer.rfind("\n", 0, match.start()) + 1
+            if "₹" in buffer[line_start:match.start()]:
+                continue
+
+            days = parse_days(match.group("days"))
+            intervals = parse_time_ranges(match.group("ranges"))
+            if days and intervals:
+                self.clinic["hours"].append({"days": days, "intervals": intervals})
 
         # ---------------------------
-        # Closed Days
+        # Closed Days / Holidays
         # ---------------------------
-        if re.search(r"Closed\s+on\s+Sunday", full_text, re.IGNORECASE):
-            clinic["closed_days"].append("Sunday")
+        for match in self._matches(CLOSED_DAYS_PATTERN, cut, final):
+            for day in parse_days(match.group("days")):
+                if DAY_NAMES[day] not in self.clinic["closed_days"]:
+                    self.clinic["closed_days"].append(DAY_NAMES[day])
+
+        for match in self._matches(HOLIDAYS_PATTERN, cut, final):
+            for text in DATE_PATTERN.findall(match.group("dates")):
+                holiday = parse_date(text)
+                if holiday and holiday.isoformat() not in self.clinic["holidays"]:
+                    self.clinic["holidays"].append(holiday.isoformat())
 
         # ---------------------------
         # Services & Pricing
         # ---------------------------
-        service_matches = re.findall(
-            r"[-•\d]+\s*(.+?)\s*[–\-]\s*₹\s*(\d+)",
-            full_text
-        )
-
-        for name, price in service_matches:
-            clinic["services"].append({
-                "name": name.strip(),
-                "price": int(price)
-            })
+        for match in self._matches(SERVICE_PATTERN, cut, final):
+            service = {
+                "name": match.group(1).strip(),
+                "price": int(match.group(2))
+            }
+            hours = parse_service_hours(match.group(3))
+            if hours:
+                service["hours"] = hours
+            self.clinic["services"].append(service)
 
-        clinics.append(clinic)
-
-    return clinics
+        self.buffer = buffer[cut:]
+        self.positions = {
+            pattern: max(position - cut, 0)
+            for pattern, position in self.positions.items()
+        }
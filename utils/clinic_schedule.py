@@ -0,0 +1,301 @@
+import re
+from datetime import date, datetime, timedelta
+
+from models.registry import get_resource
+from utils.service_catalog import name_tokens
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DAY_PREFIXES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+# Building blocks shared with clinic_parser
+DAY = (
+    r"\b(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+    r"|mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)s?\b\.?"
+)
+TIME = r"\d{1,2}(?:[:\.]\d{2})?\s*(?:am|pm)"
+TIME_RANGE = rf"{TIME}\s*(?:[–\-]|to)\s*{TIME}"
+DATE = r"\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[-/\.]\d{1,2}[-/\.]\d{4}"
+
+DAY_PATTERN = re.compile(DAY, re.IGNORECASE)
+DAY_RANGE_PATTERN = re.compile(rf"({DAY})\s*(?:to|[–\-])\s*({DAY})", re.IGNORECASE)
+TIME_RANGE_PATTERN = re.compile(rf"({TIME})\s*(?:[–\-]|to)\s*({TIME})", re.IGNORECASE)
+DATE_PATTERN = re.compile(DATE)
+CLOCK_PATTERN = re.compile(r"^\s*(\d{1,2})(?:[:\.](\d{2}))?\s*(am|pm)?\s*$", re.IGNORECASE)
+
+MINUTES_PER_DAY = 24 * 60
+
+
+# --------------------------------
+# Parsing helpers
+# --------------------------------
+def parse_clock(text: str):
+    """
+    '8.30 AM' / '8:30 am' / '11 AM' / '14:00' → minutes after midnight (None if invalid)
+    """
+    match = CLOCK_PATTERN.match(text or "")
+    if not match:
+        return None
+
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if minute > 59:
+        return None
+
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.lower() == "pm" else 0)
+    elif hour > 23 or match.group(2) is None:
+        # Bare '11' is ambiguous; 24h times need minutes
+        return None
+
+    return hour * 60 + minute
+
+
+def format_clock(minutes: int) -> str:
+    """
+    570 → '9:30 AM'
+    """
+    hour, minute = divmod(minutes % MINUTES_PER_DAY, 60)
+    return f"{hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def parse_days(text: str) -> list:
+    """
+    'Monday to Friday & Saturday' → [0, 1, 2, 3, 4, 5]
+    """
+    days = []
+
+    def add(day):
+        if day not in days:
+            days.append(day)
+
+    def index_of(name):
+        return DAY_PREFIXES.index(name[:3].lower())
+
+    position = 0
+    for match in DAY_RANGE_PATTERN.finditer(text):
+        for name in DAY_PATTERN.findall(text[position:match.start()]):
+            add(index_of(name))
+
+        start, end = index_of(match.group(1)), index_of(match.group(2))
+        for offset in range((end - start) % 7 + 1):
+            add((start + offset) % 7)
+        position = match.end()
+
+    for name in DAY_PATTERN.findall(text[position:]):
+        add(index_of(name))
+
+    return sorted(days)
+
+
+def parse_time_ranges(text: str) -> list:
+    """
+    '9:00 AM – 1:00 PM, 4 PM – 8 PM' → [[540, 780], [960, 1200]]
+    """
+    intervals = []
+    for start_text, end_text in TIME_RANGE_PATTERN.findall(text):
+        start, end = parse_clock(start_text), parse_clock(end_text)
+        if start is not None and end is not None and start < end:
+            intervals.append([start, end])
+    return intervals
+
+
+def parse_date(text: str):
+    """
+    'today' / 'tomorrow' / '21-01-2025' / '21/01/2025' / '2025-01-21' → date (None if invalid)
+    """
+    text = (text or "").strip().lower()
+
+    if text == "today":
+        return date.today()
+    if text == "tomorrow":
+        return date.today() + timedelta(days=1)
+
+    for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+
+    return None
+
+
+def _merge(intervals: list) -> list:
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _mask(intervals: list) -> int:
+    # Bit m set ⇔ minute m of the day is open; interval ends are exclusive
+    mask = 0
+    for start, end in intervals:
+        mask |= ((1 << (end - start)) - 1) << start
+    return mask
+
+
+# --------------------------------
+# Compiled schedule
+# --------------------------------
+class WeeklyHours:
+    """
+    Per-weekday open intervals (minutes, end exclusive) plus one bitmask
+    per weekday, so "open for this whole slot?" is a single AND
+    """
+
+    def __init__(self, hours: list):
+        # Later rules override earlier ones for the same day
+        # ('Monday to Saturday ...' then 'Saturday: 10 AM – 2 PM')
+        week = [[] for _ in range(7)]
+        for rule in hours:
+            for day in rule["days"]:
+                week[day] = _merge(rule["intervals"])
+
+        self.intervals = week
+        self.masks = [_mask(intervals) for intervals in week]
+
+    def is_open_during(self, weekday: int, start: int, end: int) -> bool:
+        span = ((1 << (end - start)) - 1) << start
+        return self.masks[weekday] & span == span
+
+
+class ClinicSchedule:
+    """
+    A clinic's hours compiled once at load time: weekly hours, closed
+    dates and optional per-service hours (which narrow the clinic's)
+    """
+
+    def __init__(self, clinic: dict):
+        hours = list(clinic.get("hours") or legacy_hours(clinic))
+
+        # Nothing parsed means unknown, not closed all week: only closed
+        # days / holidays block a date, but no time counts as within hours
+        # (callers ask the user instead) and no slots are offered
+        self.hours_known = any(rule["intervals"] for rule in hours)
+        if not self.hours_known:
+            hours = [{"days": list(range(7)), "intervals": [[0, MINUTES_PER_DAY]]}]
+
+        # 'Closed on Sunday' wins over any range that covers Sunday
+        closed = [DAY_NAMES.index(d) for d in clinic.get("closed_days", []) if d in DAY_NAMES]
+        self.closed_days = sorted(set(closed))
+        if closed:
+            hours.append({"days": closed, "intervals": []})
+
+        self.weekly = WeeklyHours(hours)
+        self.holidays = {date.fromisoformat(d) for d in clinic.get("holidays", [])}
+
+        self.services = {}
+        for service in clinic.get("services", []):
+            if service.get("hours"):
+                self.services[_service_key(service["name"])] = WeeklyHours(service["hours"])
+
+    def _service_hours(self, service: str):
+        return self.services.get(_service_key(service or ""))
+
+    def has_hours(self, service: str = None) -> bool:
+        """
+        Whether real opening times are known (clinic or service hours)
+        """
+        return self.hours_known or self._service_hours(service) is not None
+
+    def is_open_on(self, day: date, service: str = None) -> bool:
+        if day in self.holidays or not self.weekly.masks[day.weekday()]:
+            return False
+
+        service_hours = self._service_hours(service)
+        return service_hours is None or bool(service_hours.masks[day.weekday()])
+
+    def is_open_during(self, day: date, start: int, end: int, service: str = None) -> bool:
+        if not self.has_hours(service):
+            return False
+        if day in self.holidays or not self.weekly.is_open_during(day.weekday(), start, end):
+            return False
+
+        service_hours = self._service_hours(service)
+        return service_hours is None or service_hours.is_open_during(day.weekday(), start, end)
+
+    def intervals_on(self, day: date, service: str = None) -> list:
+        """
+        Open intervals on that date (clinic ∩ service hours); none when
+        the hours are unknown
+        """
+        if day in self.holidays or not self.has_hours(service):
+            return []
+
+        intervals = self.weekly.intervals[day.weekday()]
+        service_hours = self._service_hours(service)
+        if service_hours is None:
+            return intervals
+
+        clipped = []
+        for start, end in intervals:
+            for service_start, service_end in service_hours.intervals[day.weekday()]:
+                lo, hi = max(start, service_start), min(end, service_end)
+                if lo < hi:
+                    clipped.append([lo, hi])
+        return clipped
+
+    def describe(self) -> list:
+        """
+        ['Monday – Friday: 9:00 AM – 1:00 PM, 4:00 PM – 8:00 PM', 'Sunday: Closed', ...]
+        """
+        if not self.hours_known:
+            lines = ["Hours not specified"]
+            if self.closed_days:
+                lines.append(f"Closed on {', '.join(DAY_NAMES[d] for d in self.closed_days)}")
+            return lines
+
+        lines = []
+        day = 0
+        while day < 7:
+            last = day
+            while last + 1 < 7 and self.weekly.intervals[last + 1] == self.weekly.intervals[day]:
+                last += 1
+
+            days = DAY_NAMES[day] if day == last else f"{DAY_NAMES[day]} – {DAY_NAMES[last]}"
+            hours = describe_intervals(self.weekly.intervals[day]) or "Closed"
+            lines.append(f"{days}: {hours}")
+            day = last + 1
+
+        return lines
+
+
+def _service_key(name: str) -> str:
+    # Same normalization as the service catalog ('Teeth cleanings' = 'Teeth Cleaning')
+    return " ".join(name_tokens(name))
+
+
+def describe_intervals(intervals: list) -> str:
+    return ", ".join(f"{format_clock(start)} – {format_clock(end)}" for start, end in intervals)
+
+
+def legacy_hours(clinic: dict) -> list:
+    """
+    Clinics parsed before per-weekday hours: one 'Monday to Saturday' range
+    """
+    start = parse_clock(clinic.get("open_time") or "")
+    end = parse_clock(clinic.get("close_time") or "")
+    if start is None or end is None or start >= end:
+        return []
+
+    closed = {DAY_NAMES.index(d) for d in clinic.get("closed_days", []) if d in DAY_NAMES}
+    return [{"days": [d for d in range(6) if d not in closed], "intervals": [[start, end]]}]
+
+
+def get_clinic_schedules(clinics: list, kb_version: str) -> dict:
+    """
+    {clinic name: ClinicSchedule}, compiled once per KB version
+    """
+    return get_resource(
+        "clinic_schedules",
+        lambda: {
+            clinic["name"]: ClinicSchedule(clinic)
+            for clinic in clinics
+            if clinic.get("name")
+        },
+        (kb_version,)
+    )
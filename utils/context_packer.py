@@ -0,0 +1,114 @@
+import math
+import re
+
+from config.config import (
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_MMR_LAMBDA,
+    CONTEXT_DUPLICATE_THRESHOLD,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English BPE vocabularies
+    return math.ceil(len(text) / 4)
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _overlap(left: str, right: str, max_chars: int = 200) -> int:
+    """
+    Length of the longest suffix of left that is a prefix of right
+    """
+    for size in range(min(len(left), len(right), max_chars), 10, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def strip_overlap(text: str, kept: list) -> str:
+    """
+    Drop the text-splitter overlap shared with any already kept chunk
+    """
+    for other in kept:
+        head = _overlap(other, text)
+        if head:
+            text = text[head:]
+
+        tail = _overlap(text, other)
+        if tail:
+            text = text[:-tail]
+
+    return text.strip()
+
+
+def pack_context(texts: list, max_chunks: int, budget: int = CONTEXT_TOKEN_BUDGET):
+    """
+    texts are best-first retrieval results.
+
+    Removes overlaps / near-duplicates, picks chunks by maximal marginal
+    relevance and stops at the token budget.
+    Returns (context, stats).
+    """
+    tokens_in = sum(estimate_tokens(t) for t in texts[:max_chunks])
+
+    candidates = []
+    for rank, text in enumerate(texts):
+        candidates.append({
+            "text": text,
+            "shingles": _shingles(text),
+            # Retrieval order is the relevance signal
+            "relevance": 1.0 - rank / max(len(texts), 1),
+        })
+
+    kept = []
+    used = 0
+
+    while candidates and len(kept) < max_chunks:
+        def mmr(candidate):
+            redundancy = max(
+                (_jaccard(candidate["shingles"], k["shingles"]) for k in kept),
+                default=0.0
+            )
+            return (
+                CONTEXT_MMR_LAMBDA * candidate["relevance"]
+                - (1 - CONTEXT_MMR_LAMBDA) * redundancy
+            )
+
+        best = max(candidates, key=mmr)
+        candidates.remove(best)
+
+        if any(
+            _jaccard(best["shingles"], k["shingles"]) >= CONTEXT_DUPLICATE_THRESHOLD
+            for k in kept
+        ):
+            continue
+
+        text = strip_overlap(best["text"], [k["text"] for k in kept])
+        cost = estimate_tokens(text)
+        if not text or used + cost > budget:
+            continue
+
+        best["text"] = text
+        kept.append(best)
+        used += cost
+
+    stats = {
+        "chunks_in": min(len(texts), max_chunks),
+        "chunks_out": len(kept),
+        "tokens_in": tokens_in,
+        "tokens_out": used,
+        "tokens_saved": max(tokens_in - used, 0),
+    }
+
+    return "\n\n".join(k["text"] for k in kept), stats
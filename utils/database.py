@@ -1,15 +1,100 @@
 # utils/database.py
+import queue
 import sqlite3
 import os
+from contextlib import contextmanager
+
+from config.config import DB_POOL_SIZE, DB_BUSY_TIMEOUT, DB_STATEMENT_CACHE
+from models.registry import get_resource
 
 DB_PATH = "data/clinic.db"
 os.makedirs("data", exist_ok=True)
 
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",    # readers no longer block the writer
+    "PRAGMA synchronous = NORMAL",  # fsync at checkpoints only; safe under WAL
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",    # 8 MB page cache per connection
+)
+
+
 def get_connection():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    """
+    A new tuned connection; most callers want the pooled connection()
+    """
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=DB_BUSY_TIMEOUT,
+        check_same_thread=False,
+        cached_statements=DB_STATEMENT_CACHE
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """
+    Reuses connections (and with them their prepared-statement caches).
+
+    Never blocks: when every pooled connection is in use a new one is
+    opened, and it is closed on release if the pool is already full.
+    """
+
+    def __init__(self, connect, size: int):
+        self._connect = connect
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+
+        try:
+            yield conn
+        finally:
+            # Never hand the next caller someone else's open transaction
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+
+def get_pool() -> ConnectionPool:
+    return get_resource(
+        "db_pool",
+        lambda: ConnectionPool(get_connection, DB_POOL_SIZE),
+        (DB_PATH, DB_POOL_SIZE)
+    )
+
+
+def connection():
+    """
+    `with connection() as conn:` → pooled connection; commit explicitly,
+    anything left uncommitted is rolled back on release
+    """
+    return get_pool().connection()
+
 
 def init_db():
-    conn = get_connection()
+    """
+    Create / migrate the schema once per process (main() calls this on
+    every Streamlit rerun)
+    """
+    get_resource("db_schema", _init_schema, (DB_PATH,))
+
+
+def _init_schema():
+    with connection() as conn:
+        _create_schema(conn)
+    return True
+
+
+def _create_schema(conn):
     cur = conn.cursor()
 
     cur.execute("""
@@ -34,5 +119,53 @@ def init_db():
     )
     """)
 
+    # Slot columns: normalized date + [start_min, end_min) for conflict checks
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(bookings)")}
+    for column, definition in (
+        ("slot_date", "TEXT"),
+        ("start_min", "INTEGER"),
+        ("end_min", "INTEGER"),
+    ):
+        if column not in columns:
+            cur.execute(f"ALTER TABLE bookings ADD COLUMN {column} {definition}")
+
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_bookings_slot
+    ON bookings (clinic, slot_date, start_min)
+    """)
+
+    backfill_slots(cur)
+
     conn.commit()
-    conn.close()
+
+
+def backfill_slots(cur):
+    """
+    Fill slot columns for bookings saved before they existed
+    ('' when the stored date / time can't be parsed)
+    """
+    from datetime import date, timedelta
+    from config.config import SLOT_MINUTES
+    from utils.clinic_schedule import parse_clock, parse_date
+
+    rows = cur.execute(
+        "SELECT id, date, time, created_at FROM bookings WHERE slot_date IS NULL"
+    ).fetchall()
+
+    for booking_id, date_text, time_text, created_at in rows:
+        # 'today' / 'tomorrow' were relative to when the booking was made
+        relative = {"today": 0, "tomorrow": 1}.get((date_text or "").strip().lower())
+        if relative is not None and created_at:
+            day = date.fromisoformat(created_at[:10]) + timedelta(days=relative)
+        else:
+            day = parse_date(date_text)
+        start = parse_clock(time_text)
+
+        if day is None or start is None:
+            cur.execute("UPDATE bookings SET slot_date = '' WHERE id = ?", (booking_id,))
+            continue
+
+        cur.execute(
+            "UPDATE bookings SET slot_date = ?, start_min = ?, end_min = ? WHERE id = ?",
+            (day.isoformat(), start, start + SLOT_MINUTES, booking_id)
+        )
@@ -0,0 +1,71 @@
+# utils/embedding_cache.py
+import hashlib
+import sqlite3
+from array import array
+
+EMBEDDING_CACHE_DB = "data/embedding_cache.db"
+
+# SQLite caps bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_embedding_cache_connection():
+    conn = sqlite3.connect(EMBEDDING_CACHE_DB, check_same_thread=False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS chunk_embeddings (
+        model_id TEXT NOT NULL,
+        text_hash TEXT NOT NULL,
+        vector BLOB NOT NULL,
+        PRIMARY KEY (model_id, text_hash)
+    )
+    """)
+    return conn
+
+
+def get_cached_embeddings(model_id: str, hashes: list) -> dict:
+    """
+    text_hash → vector for every hash already embedded with model_id
+    """
+    found = {}
+    unique = list(dict.fromkeys(hashes))
+
+    conn = get_embedding_cache_connection()
+    try:
+        for i in range(0, len(unique), _LOOKUP_BATCH):
+            batch = unique[i:i + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            for h, blob in conn.execute(
+                f"SELECT text_hash, vector FROM chunk_embeddings "
+                f"WHERE model_id = ? AND text_hash IN ({placeholders})",
+                [model_id, *batch]
+            ):
+                vector = array("f")
+                vector.frombytes(blob)
+                found[h] = vector.tolist()
+    finally:
+        conn.close()
+
+    return found
+
+
+def save_cached_embeddings(model_id: str, hashed_vectors: list):
+    """
+    hashed_vectors: [(text_hash, vector), ...]
+    """
+    if not hashed_vectors:
+        return
+
+    conn = get_embedding_cache_connection()
+    try:
+        conn.executemany(
+            "INSERT OR IGNORE INTO chunk_embeddings (model_id, text_hash, vector) "
+            "VALUES (?, ?, ?)",
+            [(model_id, h, array("f", vector).tobytes()) for h, vector in hashed_vectors]
+        )
+        conn.commit()
+    finally:
+        conn.close()
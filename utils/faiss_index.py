@@ -0,0 +1,227 @@
+import math
+import time
+
+import faiss
+import numpy as np
+
+from config.config import (
+    FAISS_INDEX_TYPE,
+    FAISS_AUTO_HNSW_AT,
+    FAISS_AUTO_IVFPQ_AT,
+    HNSW_M,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    IVF_NPROBE,
+    IVFPQ_SUBQUANTIZERS,
+)
+
+
+# --------------------------------
+# Index selection / construction
+# --------------------------------
+def choose_index_type(n_vectors: int) -> str:
+    if FAISS_INDEX_TYPE != "auto":
+        return FAISS_INDEX_TYPE
+    if n_vectors >= FAISS_AUTO_IVFPQ_AT:
+        return "ivfpq"
+    if n_vectors >= FAISS_AUTO_HNSW_AT:
+        return "hnsw"
+    return "flat"
+
+
+def index_type_of(index) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def _nlist_for(n_vectors: int) -> int:
+    # ~4·√n lists, and at least 39 training points per centroid
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def _buildable_type(n_vectors: int, dim: int, index_type: str) -> str:
+    # Too little data to train → the next simpler type
+    if index_type == "ivfpq" and (n_vectors < 256 * 39 or dim % IVFPQ_SUBQUANTIZERS):
+        index_type = "ivf"
+    if index_type == "ivf" and n_vectors < 39:
+        index_type = "flat"
+    return index_type
+
+
+def new_index(dim: int, n_vectors: int, index_type: str):
+    """
+    Empty L2 index of index_type, sized for n_vectors (train it before
+    adding when it isn't trained yet).
+
+    L2 on normalized vectors ranks exactly like the default flat store.
+    Falls back to a simpler type when there is too little data to train.
+    """
+    built_type = _buildable_type(n_vectors, dim, index_type)
+    if built_type != index_type:
+        print(f"⚠️ FAISS: {n_vectors} vectors can't train {index_type}, building {built_type}")
+
+    if built_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif built_type in ("ivf", "ivfpq"):
+        quantizer = faiss.IndexFlatL2(dim)
+        nlist = _nlist_for(n_vectors)
+        if built_type == "ivfpq":
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, IVFPQ_SUBQUANTIZERS, 8)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    else:
+        index = faiss.IndexFlatL2(dim)
+
+    apply_search_params(index)
+    return index
+
+
+def build_index(vectors: np.ndarray, index_type: str):
+    """
+    Build (and train if needed) an index over vectors
+    """
+    index = new_index(vectors.shape[1], len(vectors), index_type)
+    if not index.is_trained:
+        index.train(vectors)
+    if len(vectors):
+        index.add(vectors)
+    return index
+
+
+def training_size(index) -> int:
+    # faiss's own cap on k-means points per centroid
+    return 256 * faiss.extract_index_ivf(index).nlist
+
+
+def apply_search_params(index):
+    index_type = index_type_of(index)
+
+    if index_type == "hnsw":
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    elif index_type in ("ivf", "ivfpq"):
+        index.nprobe = IVF_NPROBE
+
+
+def _enable_reconstruct(index):
+    if index_type_of(index) in ("ivf", "ivfpq"):
+        faiss.extract_index_ivf(index).make_direct_map()
+
+
+def all_vectors(index) -> np.ndarray:
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+
+    _enable_reconstruct(index)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+# --------------------------------
+# Store maintenance
+# --------------------------------
+def reindex_target(index):
+    """
+    Index type to rebuild index as for its current size (as requested,
+    before any fallback), or None when it already fits (same type and, for IVF, lists within 2x of the right
+    count for this many vectors)
+    """
+    requested = choose_index_type(index.ntotal)
+    current = index_type_of(index)
+    # Compare what would actually be built, so a fallback isn't redone
+    # on every sync
+    if _buildable_type(index.ntotal, index.d, requested) != current:
+        return requested
+
+    if current in ("ivf", "ivfpq"):
+        nlist = faiss.extract_index_ivf(index).nlist
+        target = _nlist_for(index.ntotal)
+        if nlist * 2 < target or nlist > target * 2:
+            return requested
+
+    return None
+
+
+def remove_vectors(vector_store, ids: list):
+    """
+    Delete docs by id for any index type.
+
+    Flat indexes go through FAISS.delete. HNSW can't remove and IVF keeps
+    stale positions, so those are rebuilt from the remaining vectors.
+    """
+    if index_type_of(vector_store.index) == "flat":
+        vector_store.delete(ids)
+        return
+
+    ids = set(ids)
+    keep = [
+        (position, doc_id)
+        for position, doc_id in sorted(vector_store.index_to_docstore_id.items())
+        if doc_id not in ids
+    ]
+
+    vectors = all_vectors(vector_store.index)[[position for position, _ in keep]]
+
+    if index_type_of(vector_store.index) == "hnsw":
+        vector_store.index = build_index(vectors, "hnsw")
+    else:
+        # Keep the trained IVF quantizer, just refill the lists
+        vector_store.index.reset()
+        if len(vectors):
+            vector_store.index.add(vectors)
+
+    vector_store.docstore.delete(list(ids))
+    vector_store.index_to_docstore_id = {
+        i: doc_id for i, (_, doc_id) in enumerate(keep)
+    }
+
+
+# --------------------------------
+# Recall / latency report
+# --------------------------------
+def _timed_search(index, queries: np.ndarray, k: int):
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        _, positions = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(positions[0])
+    return results, latencies
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def recall_latency_report(index, exact_vectors: np.ndarray, query_vectors: np.ndarray, k: int = 4) -> dict:
+    """
+    recall@k and per-query latency of index against an exact flat baseline
+    """
+    baseline = faiss.IndexFlatL2(exact_vectors.shape[1])
+    baseline.add(exact_vectors)
+
+    exact, exact_ms = _timed_search(baseline, query_vectors, k)
+    approx, approx_ms = _timed_search(index, query_vectors, k)
+
+    recalls = [
+        len(set(e[e >= 0]) & set(a[a >= 0])) / max(1, len(e[e >= 0]))
+        for e, a in zip(exact, approx)
+    ]
+
+    return {
+        "index_type": index_type_of(index),
+        "vectors": int(index.ntotal),
+        "queries": len(query_vectors),
+        "k": k,
+        f"recall@{k}": round(sum(recalls) / max(1, len(recalls)), 4),
+        "flat_p50_ms": round(_percentile(exact_ms, 50), 3),
+        "flat_p95_ms": round(_percentile(exact_ms, 95), 3),
+        "p50_ms": round(_percentile(approx_ms, 50), 3),
+        "p95_ms": round(_percentile(approx_ms, 95), 3),
+    }
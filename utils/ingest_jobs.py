@@ -0,0 +1,284 @@
+# utils/ingest_jobs.py
+import hashlib
+import json
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+from config.config import INGEST_JOB_STALE_SECONDS
+from models.registry import get_resource
+from utils.database import connection
+
+# Stages reported by sync_knowledge_base → slice of the overall progress bar
+STAGE_SPAN = {"parsing": (0.0, 0.3), "embedding": (0.3, 0.95)}
+PROGRESS_SECONDS = 1.0  # min gap between progress writes
+# A running job's updated_at is refreshed this often, whatever stage it is in
+HEARTBEAT_SECONDS = INGEST_JOB_STALE_SECONDS / 10
+
+_wakeup = threading.Event()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+@contextmanager
+def jobs_connection():
+    """
+    Pooled clinic.db connection; the jobs table is created on first use
+    """
+    global _schema_ready
+
+    with connection() as conn:
+        if not _schema_ready:
+            with _schema_lock:
+                if not _schema_ready:
+                    _create_jobs_table(conn)
+                    _schema_ready = True
+        yield conn
+
+
+def _create_jobs_table(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ingest_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        status TEXT NOT NULL,
+        pdf_paths TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        stage TEXT,
+        progress REAL DEFAULT 0,
+        message TEXT,
+        kb_version TEXT,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        updated_at REAL,
+        finished_at REAL
+    )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ingest_jobs_status "
+        "ON ingest_jobs (status, id)"
+    )
+    conn.commit()
+
+
+def _row_to_job(row):
+    if row is None:
+        return None
+
+    keys = (
+        "id", "status", "pdf_paths", "fingerprint", "stage", "progress",
+        "message", "kb_version", "created_at", "started_at", "updated_at",
+        "finished_at",
+    )
+    job = dict(zip(keys, row))
+    job["pdf_paths"] = json.loads(job["pdf_paths"])
+    return job
+
+
+# --------------------------------
+# Queue
+# --------------------------------
+def enqueue_ingest(pdf_paths: list) -> int:
+    """
+    Queue a sync of the knowledge base to pdf_paths and return the job id.
+
+    An identical queued / running job is reused instead of adding another.
+    """
+    paths = sorted(pdf_paths)
+    fingerprint = hashlib.sha256("\n".join(paths).encode()).hexdigest()
+    with jobs_connection() as conn:
+        row = conn.execute(
+            "SELECT id FROM ingest_jobs "
+            "WHERE fingerprint = ? AND status IN ('queued', 'running') "
+            "ORDER BY id DESC LIMIT 1",
+            (fingerprint,)
+        ).fetchone()
+
+        if row:
+            job_id = row[0]
+        else:
+            cur = conn.execute(
+                "INSERT INTO ingest_jobs (status, pdf_paths, fingerprint, stage, created_at) "
+                "VALUES ('queued', ?, ?, 'queued', ?)",
+                (json.dumps(paths), fingerprint, time.time())
+            )
+            conn.commit()
+            job_id = cur.lastrowid
+
+    start_ingest_worker()
+    _wakeup.set()
+    return job_id
+
+
+def get_job(job_id: int):
+    with jobs_connection() as conn:
+        row = conn.execute("SELECT * FROM ingest_jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row_to_job(row)
+
+
+def get_active_job():
+    """
+    The running job, else the newest queued one (None when idle)
+    """
+    with jobs_connection() as conn:
+        row = conn.execute(
+            "SELECT * FROM ingest_jobs WHERE status IN ('queued', 'running') "
+            "ORDER BY status = 'running' DESC, id DESC LIMIT 1"
+        ).fetchone()
+    return _row_to_job(row)
+
+
+def _claim_next_job():
+    """
+    Atomically take the newest queued job, unless another process is
+    already running one. Older queued jobs are superseded: the newest
+    carries the full PDF list.
+    """
+    now = time.time()
+    with jobs_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+
+        # Worker died mid-job (no heartbeat) → free the queue
+        conn.execute(
+            "UPDATE ingest_jobs SET status = 'failed', message = 'worker stopped responding', "
+            "finished_at = ? WHERE status = 'running' AND updated_at < ?",
+            (now, now - INGEST_JOB_STALE_SECONDS)
+        )
+
+        running = conn.execute(
+            "SELECT 1 FROM ingest_jobs WHERE status = 'running'"
+        ).fetchone()
+        row = None if running else conn.execute(
+            "SELECT * FROM ingest_jobs WHERE status = 'queued' ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+
+        if row:
+            conn.execute(
+                "UPDATE ingest_jobs SET status = 'superseded', finished_at = ? "
+                "WHERE status = 'queued' AND id < ?",
+                (now, row[0])
+            )
+            conn.execute(
+                "UPDATE ingest_jobs SET status = 'running', stage = 'starting', "
+                "started_at = ?, updated_at = ? WHERE id = ?",
+                (now, now, row[0])
+            )
+
+        conn.commit()
+
+    return _row_to_job(row)
+
+
+class JobLost(Exception):
+    """
+    The job stopped being ours (another process marked it stale)
+    """
+
+
+def _update_job(job_id: int, **fields) -> bool:
+    """
+    Update a job this process is running; False once it is no longer
+    'running' (e.g. failed as stale), so a late write can't resurrect it
+    """
+    fields["updated_at"] = time.time()
+    assignments = ", ".join(f"{key} = ?" for key in fields)
+
+    with jobs_connection() as conn:
+        updated = conn.execute(
+            f"UPDATE ingest_jobs SET {assignments} WHERE id = ? AND status = 'running'",
+            (*fields.values(), job_id)
+        ).rowcount
+        conn.commit()
+    return updated > 0
+
+
+def _heartbeat(job_id: int, stop: threading.Event, lost: threading.Event):
+    # Covers steps that report no progress (index rebuilds, saves, shards)
+    while not stop.wait(HEARTBEAT_SECONDS):
+        if not _update_job(job_id):
+            lost.set()
+            return
+
+
+# --------------------------------
+# Worker
+# --------------------------------
+def _run_job(job: dict):
+    from utils.knowledge_base import sync_knowledge_base
+
+    last_beat = 0.0
+    stop, lost = threading.Event(), threading.Event()
+    heartbeat = threading.Thread(
+        target=_heartbeat,
+        args=(job["id"], stop, lost),
+        name=f"ingest-heartbeat-{job['id']}",
+        daemon=True
+    )
+
+    def report(stage, done, total):
+        nonlocal last_beat
+        # Abort before publishing a sync another process has taken over
+        if lost.is_set():
+            raise JobLost(f"job {job['id']} is no longer running")
+
+        now = time.time()
+        if now - last_beat < PROGRESS_SECONDS and done < total:
+            return
+        last_beat = now
+
+        start, end = STAGE_SPAN.get(stage, (0.0, 0.95))
+        if not _update_job(
+            job["id"],
+            stage=stage,
+            progress=start + (end - start) * done / max(total, 1),
+            message=f"{stage.title()} {done}/{total}"
+        ):
+            lost.set()
+            raise JobLost(f"job {job['id']} is no longer running")
+
+    heartbeat.start()
+    try:
+        version, changed = sync_knowledge_base(job["pdf_paths"], progress=report)
+    except JobLost:
+        return
+    except Exception as e:
+        traceback.print_exc()
+        _update_job(job["id"], status="failed", message=str(e), finished_at=time.time())
+        return
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    _update_job(
+        job["id"],
+        status="done",
+        stage="done",
+        progress=1.0,
+        message="Knowledge base updated" if changed else "Knowledge base already up to date",
+        kb_version=version,
+        finished_at=time.time()
+    )
+
+
+def _worker_loop():
+    while True:
+        _wakeup.clear()
+        job = _claim_next_job()
+        if job is None:
+            # Poll too: jobs may be queued by another process
+            _wakeup.wait(timeout=INGEST_JOB_STALE_SECONDS / 10)
+            continue
+
+        _run_job(job)
+
+
+def start_ingest_worker():
+    """
+    One daemon worker thread per process; idempotent
+    """
+    def start():
+        thread = threading.Thread(target=_worker_loop, name="ingest-worker", daemon=True)
+        thread.start()
+        return thread
+
+    return get_resource("ingest_worker", start)
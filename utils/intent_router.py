@@ -0,0 +1,94 @@
+import re
+import threading
+import time
+
+
+class IntentRouter:
+    """
+    Routes a message to the highest-priority intent whose rules fire.
+
+    Each route's keywords / patterns are compiled once into one alternation
+    and routes are tried in priority order, so a message stops at the first
+    route that matches (and whose guard agrees) instead of testing them all.
+
+    routes, highest priority first:
+        {"name": ..., "exact": [...], "keywords": [...], "patterns": [...]}
+    A route matches when the message equals an `exact` phrase, contains a
+    keyword or matches a pattern (matched against the lowercased message),
+    and its guard (passed to route(), for session state) agrees. A route
+    with no text rules matches on its guard alone.
+    """
+
+    def __init__(self, routes: list, default: str):
+        self.routes = [
+            {"exact": [], "keywords": [], "patterns": [], **route}
+            for route in routes
+        ]
+        self.default = default
+        self._lock = threading.Lock()
+        self.stats = {
+            name: {"hits": 0, "total_ms": 0.0, "max_ms": 0.0}
+            for name in [route["name"] for route in routes] + [default]
+        }
+
+        for route in self.routes:
+            route["exact"] = {phrase.strip().lower() for phrase in route["exact"]}
+
+            alternatives = [re.escape(k.lower()) for k in route["keywords"]] + route["patterns"]
+            # Case-sensitive on purpose: the message is lowercased first, and
+            # re.IGNORECASE would turn off the literal-prefix scan (~6x slower)
+            route["matcher"] = re.compile("|".join(alternatives)) if alternatives else None
+
+    @staticmethod
+    def _fires(route: dict, text: str) -> bool:
+        return text in route["exact"] or (
+            route["matcher"] is not None and route["matcher"].search(text) is not None
+        )
+
+    def route(self, text: str, guards: dict = None) -> str:
+        """
+        Highest-priority matching route name (or the default).
+        guards: {route name: callable(text) -> bool}
+        """
+        start = time.perf_counter()
+        lowered = text.strip().lower()
+        guards = guards or {}
+
+        name = self.default
+        for route in self.routes:
+            guard = guards.get(route["name"])
+            has_rules = bool(route["exact"]) or route["matcher"] is not None
+
+            if has_rules and not self._fires(route, lowered):
+                continue
+            if not has_rules and guard is None:
+                continue
+            if guard is not None and not guard(text):
+                continue
+
+            name = route["name"]
+            break
+
+        self._record(name, (time.perf_counter() - start) * 1000)
+        return name
+
+    def _record(self, name: str, elapsed_ms: float):
+        with self._lock:
+            stats = self.stats[name]
+            stats["hits"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def get_stats(self) -> dict:
+        """
+        {route: {"hits", "avg_ms", "max_ms"}}; latency includes guard checks
+        """
+        with self._lock:
+            return {
+                name: {
+                    "hits": stats["hits"],
+                    "avg_ms": stats["total_ms"] / stats["hits"] if stats["hits"] else 0.0,
+                    "max_ms": stats["max_ms"],
+                }
+                for name, stats in self.stats.items()
+            }
@@ -0,0 +1,359 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.rag_pipeline import (
+    FAISS_DIR,
+    current_index_dir,
+    new_index_dir,
+    publish_index_dir,
+    has_index,
+    load_vector_store,
+    save_vector_store,
+    split_pages,
+    embed_texts,
+    add_chunks,
+    delete_chunks,
+    shard_key,
+    shard_dir,
+)
+from utils.clinic_parser import ClinicTextParser
+from utils.pdf_text import (
+    file_sha256,
+    iter_pages,
+    cache_pages,
+    drop_cached_pages,
+)
+from utils.answer_cache import clear_answer_cache
+from config.config import (
+    INGEST_WORKERS,
+    EMBED_WORKERS,
+    EMBED_BATCH_SIZE,
+    SHARD_BY_CLINIC,
+)
+
+MANIFEST_NAME = "manifest.json"
+CLINICS_CACHE = "data/clinics.json"
+
+# manifest path → (mtime_ns, manifest); published versions never change
+_manifest_memo = {}
+
+
+# --------------------------------
+# Manifest
+# --------------------------------
+def manifest_path(directory: str = None) -> str:
+    directory = directory or current_index_dir()
+    # The old single-directory index (straight in FAISS_DIR) has none
+    if directory and directory != FAISS_DIR:
+        return os.path.join(directory, MANIFEST_NAME)
+    return None
+
+
+def load_manifest() -> dict:
+    """
+    Manifest layout (stored inside the live index version):
+    {"files": {<sha256>: {"path": ..., "ids": [...], "clinic": {...}, "shard": ...}},
+     "index_type": "flat" | "hnsw" | "ivf" | "ivfpq"}
+
+    The returned dict is shared; copy it before changing it.
+    """
+    path = manifest_path()
+    if not path or not os.path.exists(path):
+        return {"files": {}}
+
+    mtime = os.stat(path).st_mtime_ns
+    cached = _manifest_memo.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, "r") as f:
+        manifest = json.load(f)
+
+    _manifest_memo.clear()
+    _manifest_memo[path] = (mtime, manifest)
+    return manifest
+
+
+def save_manifest(manifest: dict, directory: str):
+    with open(os.path.join(directory, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def kb_version(manifest: dict) -> str:
+    """
+    Stable hash of the indexed PDF set ("" when the KB is empty)
+    """
+    hashes = sorted(manifest["files"])
+    if not hashes:
+        return ""
+    return hashlib.sha256("\n".join(hashes).encode()).hexdigest()[:16]
+
+
+def get_kb_version() -> str:
+    return kb_version(load_manifest())
+
+
+def get_clinics(manifest: dict = None) -> list:
+    manifest = manifest or load_manifest()
+
+    # Index built before manifests existed: its clinics are in the old
+    # clinics.json until the first sync rebuilds it
+    if not manifest["files"] and os.path.exists(CLINICS_CACHE):
+        with open(CLINICS_CACHE, "r") as f:
+            return json.load(f)
+
+    return [
+        entry["clinic"]
+        for entry in manifest["files"].values()
+        if entry.get("clinic")
+    ]
+
+
+def kb_matches(pdf_paths: list) -> bool:
+    """
+    True when the live index already reflects exactly these PDFs
+    """
+    manifest = load_manifest()
+    hashes = {file_sha256(path) for path in pdf_paths}
+
+    if hashes != set(manifest["files"]):
+        return False
+
+    return not SHARD_BY_CLINIC or all(
+        "shard" in entry for entry in manifest["files"].values()
+    )
+
+
+# --------------------------------
+# Incremental sync
+# --------------------------------
+def parse_pdfs(files: dict, progress=None) -> dict:
+    """
+    {hash: path} → {hash: page_count}; fills the page cache, in a process
+    pool when INGEST_WORKERS > 1. Pages are read back later one at a time.
+    """
+    page_counts = {}
+
+    if INGEST_WORKERS > 1 and len(files) > 1:
+        # spawn, not fork: the Streamlit server process is multi-threaded
+        # and a forked child can inherit a lock held by another thread
+        with ProcessPoolExecutor(
+            max_workers=INGEST_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            futures = {
+                pool.submit(cache_pages, path, h): h
+                for h, path in files.items()
+            }
+            for future in as_completed(futures):
+                page_counts[futures[future]] = future.result()
+                if progress:
+                    progress("parsing", len(page_counts), len(files))
+    else:
+        for h, path in files.items():
+            page_counts[h] = cache_pages(path, h)
+            if progress:
+                progress("parsing", len(page_counts), len(files))
+
+    return page_counts
+
+
+def index_pdf(vector_store, file_hash: str, path: str, on_page=None):
+    """
+    Stream one PDF into the store page by page: only the current page, one
+    embedding batch and the parser's short tail are in memory at a time.
+    Returns (vector_store, chunk_ids, clinic).
+    """
+    # Enough chunks per flush to keep every embedding worker busy
+    batch_size = EMBED_BATCH_SIZE * max(EMBED_WORKERS, 1)
+    parser = ClinicTextParser()
+    ids = []
+    pending = []
+
+    def flush(vector_store):
+        batch_ids = [f"{file_hash[:16]}-{len(ids) + i}" for i in range(len(pending))]
+        vectors = embed_texts([chunk.page_content for chunk in pending])
+        vector_store = add_chunks(vector_store, pending, batch_ids, vectors=vectors)
+
+        ids.extend(batch_ids)
+        pending.clear()
+        return vector_store
+
+    for page in iter_pages(path, file_hash):
+        parser.feed(page["text"])
+        pending.extend(split_pages([page]))
+
+        if len(pending) >= batch_size:
+            vector_store = flush(vector_store)
+        if on_page:
+            on_page()
+
+    if pending:
+        vector_store = flush(vector_store)
+
+    return vector_store, ids, parser.close()
+
+
+def sync_knowledge_base(pdf_paths: list, progress=None):
+    """
+    Bring the index in line with pdf_paths and publish it as a new version.
+
+    Unchanged PDFs are skipped, new PDFs are streamed in page by page and
+    removed PDFs have their vectors deleted. Readers keep serving the
+    previous version until the atomic swap at the end.
+    progress(stage, done, total) is called while parsing and embedding.
+    Returns (kb_version, changed).
+    """
+    base = current_index_dir()
+    # Private copy: the loaded manifest is shared with readers
+    manifest = json.loads(json.dumps(load_manifest()))
+    has_ids = any(entry["ids"] for entry in manifest["files"].values())
+
+    # Index and manifest out of step (lost files) → start over
+    if has_ids != has_index(base):
+        manifest = {"files": {}}
+        base = None
+
+    current = {}
+    for path in pdf_paths:
+        current.setdefault(file_sha256(path), path)
+
+    added = {h: p for h, p in current.items() if h not in manifest["files"]}
+    removed = [h for h in manifest["files"] if h not in current]
+    # Entries indexed before per-clinic shards existed
+    unsharded = [
+        h for h, entry in manifest["files"].items()
+        if SHARD_BY_CLINIC and "shard" not in entry and h in current
+    ]
+
+    if not added and not removed and not unsharded:
+        return kb_version(manifest), False
+
+    # Mutate a private writable copy; sessions keep reading the mmap'd one
+    target = new_index_dir()
+    vector_store = load_vector_store(writable=True, directory=base) if base else None
+
+    # Same content under a new file name → only refresh the path
+    for h, path in current.items():
+        if h in manifest["files"]:
+            manifest["files"][h]["path"] = path
+
+    # shard → ids to drop / manifest hashes whose chunks it gains
+    shard_deletes = {}
+    shard_adds = {}
+
+    # ---------------------------
+    # Removed PDFs
+    # ---------------------------
+    stale_ids = []
+    for h in removed:
+        entry = manifest["files"].pop(h)
+        stale_ids.extend(entry["ids"])
+        if entry.get("shard"):
+            shard_deletes.setdefault(entry["shard"], []).extend(entry["ids"])
+        drop_cached_pages(h)
+
+    if vector_store is not None and stale_ids:
+        delete_chunks(vector_store, stale_ids)
+
+    # ---------------------------
+    # New PDFs
+    # ---------------------------
+    page_counts = parse_pdfs(added, progress)
+    total_pages = sum(page_counts.values())
+    pages_done = 0
+
+    def on_page():
+        nonlocal pages_done
+        pages_done += 1
+        if progress:
+            progress("embedding", pages_done, total_pages)
+
+    for h, path in added.items():
+        vector_store, ids, clinic = index_pdf(vector_store, h, path, on_page)
+
+        manifest["files"][h] = {"path": path, "ids": ids, "clinic": clinic}
+        if SHARD_BY_CLINIC:
+            # Filled below, like older entries
+            unsharded.append(h)
+
+    # ---------------------------
+    # Shards (vectors from the embedding cache, no re-embedding)
+    # ---------------------------
+    for h in unsharded:
+        entry = manifest["files"][h]
+        entry["shard"] = shard_key((entry.get("clinic") or {}).get("name"))
+        if entry["shard"] and entry["ids"]:
+            shard_adds.setdefault(entry["shard"], []).append(h)
+
+    # ---------------------------
+    # Write the new version, then swap it in
+    # ---------------------------
+    manifest.pop("index_type", None)
+    if any(entry["ids"] for entry in manifest["files"].values()):
+        # Index type actually built (after any too-little-data fallback)
+        manifest["index_type"] = save_vector_store(vector_store, target)
+        update_shards(manifest, shard_deletes, shard_adds, base, target, vector_store)
+
+    save_manifest(manifest, target)
+    publish_index_dir(target)
+
+    # Clinics now live in the manifest
+    if os.path.exists(CLINICS_CACHE):
+        os.remove(CLINICS_CACHE)
+
+    # Corpus changed → cached answers are stale
+    clear_answer_cache()
+
+    return kb_version(manifest), True
+
+
+def update_shards(manifest: dict, shard_deletes: dict, shard_adds: dict, base: str, target: str, vector_store):
+    """
+    Carry untouched shards over to the new version (hard links, no copy)
+    and apply deletes / adds to the touched ones.
+
+    Added chunks are filled one PDF at a time with their exact float32
+    vectors from the embedding cache (not reconstructed from a possibly
+    lossy global index), so memory stays bounded by the largest file
+    rather than everything added in this sync.
+    """
+    live_shards = {
+        entry.get("shard")
+        for entry in manifest["files"].values()
+        if entry.get("shard") and entry["ids"]
+    }
+    touched = set(shard_deletes) | set(shard_adds)
+
+    for shard in live_shards:
+        source = shard_dir(shard, base) if base else None
+        destination = shard_dir(shard, target)
+
+        if shard not in touched:
+            if source and os.path.isdir(source):
+                try:
+                    shutil.copytree(source, destination, copy_function=os.link)
+                except OSError:
+                    shutil.copytree(source, destination, dirs_exist_ok=True)
+            continue
+
+        shard_store = (
+            load_vector_store(writable=True, directory=source)
+            if source else None
+        )
+
+        if shard_store is not None and shard in shard_deletes:
+            delete_chunks(shard_store, shard_deletes[shard])
+
+        for h in shard_adds.get(shard, []):
+            ids = manifest["files"][h]["ids"]
+            chunks = [vector_store.docstore.search(doc_id) for doc_id in ids]
+            # Cache hits for chunks embedded in this or an earlier sync
+            vectors = embed_texts([chunk.page_content for chunk in chunks])
+            shard_store = add_chunks(shard_store, chunks, ids, vectors=vectors)
+
+        save_vector_store(shard_store, destination)
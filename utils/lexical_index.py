@@ -0,0 +1,127 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "do", "does", "what", "which",
+    "who", "whom", "how", "when", "where", "of", "for", "to", "in", "on", "at",
+    "and", "or", "me", "my", "i", "you", "your", "it", "this", "that", "there",
+    "can", "please", "tell", "about", "with", "any", "have", "has",
+}
+
+
+def tokenize(text: str) -> list:
+    """
+    'Root canal – ₹500' → ['root', 'canal', '500']
+    """
+    return [
+        t for t in re.findall(r"\w+", text.lower())
+        if t not in STOPWORDS
+    ]
+
+
+class LexicalIndex:
+    """
+    Small BM25 inverted index over the same chunk ids as the FAISS store
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}     # term → {doc_id: tf}
+        self.doc_lengths = {}  # doc_id → token count
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: str, text: str):
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+        self.doc_lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, doc_id: str):
+        self.remove_many([doc_id])
+
+    def remove_many(self, doc_ids: list):
+        doc_ids = {d for d in doc_ids if d in self.doc_lengths}
+        if not doc_ids:
+            return
+
+        # One pass over the vocabulary for the whole batch
+        for term in list(self.postings):
+            docs = self.postings[term]
+            for doc_id in doc_ids.intersection(docs):
+                del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+
+        for doc_id in doc_ids:
+            self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def search(self, query: str, k: int = 10) -> list:
+        """
+        Returns [(doc_id, bm25_score, matched_terms), ...] best first
+        """
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return []
+
+        avg_length = self.total_length / n_docs or 1.0
+        scores = {}
+        matched = {}
+
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[doc_id] = matched.get(doc_id, 0) + 1
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(doc_id, score, matched[doc_id]) for doc_id, score in ranked]
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"postings": self.postings, "doc_lengths": self.doc_lengths}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        index = cls()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        index.postings = data["postings"]
+        index.doc_lengths = data["doc_lengths"]
+        index.total_length = sum(index.doc_lengths.values())
+        return index
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = 60) -> list:
+    """
+    [[key, ...], [key, ...]] → keys ordered by Σ 1 / (k + rank)
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+
+    return sorted(scores, key=scores.get, reverse=True)
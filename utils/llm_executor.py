@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import queue
+import random
+import threading
+
+from config.config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_TIMEOUT,
+    LLM_RETRIES,
+    LLM_BACKOFF,
+)
+from models.registry import get_resource
+
+_DONE = object()
+
+
+class _Flight:
+    """
+    One upstream call; every session asking the same prompt follows it
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.changed = asyncio.Condition()
+
+
+class LLMExecutor:
+    """
+    Runs LLM calls on a background asyncio loop with single-flight
+    coalescing, bounded concurrency, per-token timeouts and retry/backoff.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout: float = LLM_TIMEOUT,
+        retries: int = LLM_RETRIES,
+        backoff: float = LLM_BACKOFF
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "timeouts": 0, "errors": 0}
+
+        self._flights = {}
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+
+        async def make_semaphore():
+            return asyncio.Semaphore(max_concurrency)
+
+        self._semaphore = asyncio.run_coroutine_threadsafe(
+            make_semaphore(), self._loop
+        ).result()
+
+    # ---------------------------
+    # Loop side
+    # ---------------------------
+    @staticmethod
+    def _key(chat_model, messages) -> str:
+        payload = json.dumps([
+            getattr(chat_model, "model_name", type(chat_model).__name__),
+            [(m.type, m.content) for m in messages],
+        ])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def _publish(self, flight, chunk=None, done=False):
+        async with flight.changed:
+            if chunk:
+                flight.chunks.append(chunk)
+            if done:
+                flight.done = True
+            flight.changed.notify_all()
+
+    async def _run(self, key, flight, chat_model, messages):
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    async with self._semaphore:
+                        stream = chat_model.astream(messages).__aiter__()
+                        while True:
+                            try:
+                                chunk = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                            except StopAsyncIteration:
+                                break
+                            await self._publish(flight, chunk.content)
+                    break
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.stats["timeouts"] += 1
+
+                    # Can't retry once followers have seen partial output
+                    if flight.chunks or attempt == self.retries:
+                        raise
+
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+        except Exception as e:
+            self.stats["errors"] += 1
+            flight.error = e
+        finally:
+            self._flights.pop(key, None)
+            await self._publish(flight, done=True)
+
+    async def _join(self, chat_model, messages, out: queue.Queue):
+        key = self._key(chat_model, messages)
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            self.stats["calls"] += 1
+            asyncio.ensure_future(self._run(key, flight, chat_model, messages))
+        else:
+            self.stats["coalesced"] += 1
+
+        seen = 0
+        while True:
+            async with flight.changed:
+                await flight.changed.wait_for(
+                    lambda: len(flight.chunks) > seen or flight.done
+                )
+                new_chunks = flight.chunks[seen:]
+                done = flight.done
+
+            seen += len(new_chunks)
+            for chunk in new_chunks:
+                out.put(chunk)
+
+            if done:
+                out.put(flight.error or _DONE)
+                return
+
+    # ---------------------------
+    # Caller side (Streamlit script thread)
+    # ---------------------------
+    def stream(self, chat_model, messages):
+        out = queue.Queue()
+        asyncio.run_coroutine_threadsafe(self._join(chat_model, messages, out), self._loop)
+
+        while True:
+            item = out.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def invoke(self, chat_model, messages) -> str:
+        return "".join(self.stream(chat_model, messages))
+
+
+def get_llm_executor() -> LLMExecutor:
+    return get_resource(
+        "llm_executor",
+        LLMExecutor,
+        (LLM_MAX_CONCURRENCY, LLM_TIMEOUT, LLM_RETRIES, LLM_BACKOFF)
+    )
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+
+TEXT_CACHE_DIR = "data/text_cache"
+
+os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+
+# path → ((size, mtime_ns), sha256); every Streamlit rerun re-checks the uploads
+_hash_memo = {}
+
+
+def file_sha256(path: str) -> str:
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+
+    cached = _hash_memo.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+    _hash_memo[path] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _cache_path(file_hash: str) -> str:
+    return os.path.join(TEXT_CACHE_DIR, f"{file_hash}.jsonl")
+
+
+def iter_pages(path: str, file_hash: str = None):
+    """
+    Yield {"text": ..., "metadata": {...}} one page at a time.
+
+    Pages are extracted ONCE per PDF content and cached on disk as JSON
+    lines, so neither the first pass nor later reads hold the whole
+    document in memory.
+    """
+    if file_hash is None:
+        file_hash = file_sha256(path)
+
+    cache_path = _cache_path(file_hash)
+
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            pages = (json.loads(line) for line in f)
+            yield from _with_source(pages, path)
+        return
+
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for doc in PyPDFLoader(path).lazy_load():
+                page = {"text": doc.page_content, "metadata": doc.metadata}
+                f.write(json.dumps(page) + "\n")
+                yield page
+        os.replace(tmp_path, cache_path)
+    finally:
+        # Abandoned part-way → don't leave a truncated cache behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _with_source(pages, path: str):
+    # Cached metadata may point at an older file name
+    for page in pages:
+        page["metadata"]["source"] = path
+        yield page
+
+
+def cache_pages(path: str, file_hash: str = None) -> int:
+    """
+    Extract (or reuse) the page cache without keeping the pages; returns
+    the page count
+    """
+    return sum(1 for _ in iter_pages(path, file_hash))
+
+
+def extract_pages(path: str, file_hash: str = None) -> list:
+    return list(iter_pages(path, file_hash))
+
+
+def pages_to_documents(pages: list) -> list:
+    return [
+        Document(page_content=page["text"], metadata=page["metadata"])
+        for page in pages
+    ]
+
+
+def drop_cached_pages(file_hash: str):
+    cache_path = _cache_path(file_hash)
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
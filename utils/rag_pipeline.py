@@ -1,26 +1,344 @@
 import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import streamlit as st
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
-from models.embeddings import get_embedding_model
+from models.embeddings import get_embedding_model, get_embedding_model_id
+from langchain_core.documents import Document
+from config.config import (
+    EMBED_BATCH_SIZE,
+    EMBED_WORKERS,
+    RAG_TOP_K,
+    HYBRID_SEARCH,
+    LEXICAL_FAST_PATH,
+    LEXICAL_FAST_PATH_RATIO,
+    CONTEXT_CANDIDATES,
+    SHARD_BY_CLINIC,
+    EMBEDDING_CACHE_ENABLED,
+)
+from utils.query_cache import LRUCache, normalize_query
+from utils.pdf_text import extract_pages, pages_to_documents
+from utils.lexical_index import LexicalIndex, tokenize, reciprocal_rank_fusion
+from utils.faiss_index import (
+    apply_search_params,
+    index_type_of,
+    new_index,
+    reindex_target,
+    remove_vectors,
+    training_size,
+)
+from utils.vector_io import load_store, save_store
+from utils.context_packer import pack_context
+from utils.embedding_cache import (
+    text_hash,
+    get_cached_embeddings,
+    save_cached_embeddings,
+)
+from utils.relevance import get_relevance_threshold
+from models.registry import get_resource
 
 FAISS_DIR = "data/faiss_index"
-INDEX_FILE = os.path.join(FAISS_DIR, "index.faiss")
+CURRENT_FILE = os.path.join(FAISS_DIR, "CURRENT")
+LEXICAL_NAME = "lexical.json"
+# Vectors per batch when (re)building an index at save time
+REINDEX_BATCH = 4096
+# The old single-directory index, removed once a version is published
+LEGACY_FILES = ["index.faiss", "index.pkl"]
 
 os.makedirs(FAISS_DIR, exist_ok=True)
 
 
-def build_vector_store(pdf_paths: list):
+# --------------------------------
+# Versioned index directories
+# --------------------------------
+# Every ingestion writes a fresh data/faiss_index/v<ns>/ (global index,
+# shards/ and manifest.json) and then flips CURRENT to it with one atomic
+# rename, so readers never see a half-written index.
+def current_index_dir():
+    if os.path.exists(CURRENT_FILE):
+        with open(CURRENT_FILE, "r") as f:
+            return os.path.join(FAISS_DIR, f.read().strip())
+
+    # Pre-versioning layout: index straight in FAISS_DIR
+    if os.path.exists(os.path.join(FAISS_DIR, "index.faiss")):
+        return FAISS_DIR
+
+    return None
+
+
+def new_index_dir() -> str:
+    directory = os.path.join(FAISS_DIR, f"v{time.time_ns()}")
+    os.makedirs(directory)
+    return directory
+
+
+def publish_index_dir(directory: str):
+    """
+    Atomically make directory the live index, then drop old versions
+    (the current and previous ones are kept for sessions still reading them)
+    """
+    previous = current_index_dir()
+
+    tmp_path = CURRENT_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(os.path.basename(directory))
+    os.replace(tmp_path, CURRENT_FILE)
+
+    keep = {os.path.basename(directory)}
+    if previous and previous != FAISS_DIR:
+        keep.add(os.path.basename(previous))
+
+    for name in os.listdir(FAISS_DIR):
+        path = os.path.join(FAISS_DIR, name)
+        if name.startswith("v") and os.path.isdir(path) and name not in keep:
+            shutil.rmtree(path, ignore_errors=True)
+        elif name in LEGACY_FILES:
+            os.remove(path)
+
+
+def has_index(directory: str = None) -> bool:
+    directory = directory or current_index_dir()
+    return bool(directory) and os.path.exists(os.path.join(directory, "index.faiss"))
+
+
+def shard_key(clinic_name: str) -> str:
+    """
+    'Smile Dental Clinic' → 'smile-dental-clinic'
+    """
+    return re.sub(r"[^a-z0-9]+", "-", (clinic_name or "").lower()).strip("-")
+
+
+def shard_dir(clinic_name: str, base: str = None) -> str:
+    return os.path.join(base or current_index_dir() or FAISS_DIR, "shards", shard_key(clinic_name))
+
+
+def load_vector_store(writable: bool = False, directory: str = None, name: str = "vector_store"):
+    """
+    Readers share one memory-mapped store per process (and the OS page cache
+    across processes); writable=True returns a private copy for ingestion.
+    """
+    directory = directory or current_index_dir()
+    if not has_index(directory):
+        return None
+
+    if writable:
+        return _load_vector_store(directory, writable=True)
+
+    # Versions live in their own directories, so the path is the cache key
+    return get_resource(
+        name,
+        lambda: _load_vector_store(directory),
+        (directory,)
+    )
+
+
+def load_shard(clinic_name: str):
+    """
+    Per-clinic index, loaded lazily on the first question about that clinic
+    """
+    if not clinic_name or not shard_key(clinic_name):
+        return None
+    return load_vector_store(
+        directory=shard_dir(clinic_name),
+        name=f"shard:{shard_key(clinic_name)}"
+    )
+
+
+def _load_vector_store(directory: str, writable: bool = False):
+    vector_store = load_store(directory, get_embedding_model(), writable=writable)
+
+    apply_search_params(vector_store.index)
+
+    lexical_file = os.path.join(directory, LEXICAL_NAME)
+    if os.path.exists(lexical_file):
+        vector_store.lexical_index = LexicalIndex.load(lexical_file)
+
+    return vector_store
+
+
+def save_vector_store(vector_store, directory: str):
+    """
+    Write the store (sized to its final index type first); returns the
+    index type written, None for an empty store
+    """
+    # Empty KB / shard → nothing on disk
+    if vector_store is None:
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        return None
+
+    finalize_index(vector_store)
+
+    os.makedirs(directory, exist_ok=True)
+    get_lexical_index(vector_store).save(os.path.join(directory, LEXICAL_NAME))
+    save_store(vector_store, directory)
+    return index_type_of(vector_store.index)
+
+
+def get_lexical_index(vector_store) -> LexicalIndex:
+    """
+    BM25 index travelling with the store (rebuilt from the docstore if missing)
+    """
+    index = getattr(vector_store, "lexical_index", None)
+
+    if index is None:
+        index = LexicalIndex()
+        for doc_id in vector_store.index_to_docstore_id.values():
+            doc = vector_store.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                index.add(doc_id, doc.page_content)
+        vector_store.lexical_index = index
+
+    return index
+
+
+def get_text_splitter():
+    return RecursiveCharacterTextSplitter(
+        chunk_size=500,
+        chunk_overlap=50
+    )
+
+
+def split_pages(pages: list) -> list:
+    return get_text_splitter().split_documents(pages_to_documents(pages))
+
+
+def load_pdf_chunks(path: str) -> list:
+    return split_pages(extract_pages(path))
+
+
+EMBEDDING_CACHE_STATS = {"hits": 0, "misses": 0}
+
+
+def embed_texts(texts: list, progress=None) -> list:
+    """
+    Embed texts, encoding only chunk texts never seen by this model before.
+
+    Cache misses are encoded in EMBED_BATCH_SIZE batches across
+    EMBED_WORKERS threads. Batches are fixed by position, so the vectors
+    (and the index built from them) are the same whatever the worker count.
+    """
+    model_id = get_embedding_model_id()
+    hashes = [text_hash(text) for text in texts]
+    known = get_cached_embeddings(model_id, hashes) if EMBEDDING_CACHE_ENABLED else {}
+
+    # Each distinct unseen text is encoded once
+    missing = list(dict.fromkeys(
+        (h, text) for h, text in zip(hashes, texts) if h not in known
+    ))
+    EMBEDDING_CACHE_STATS["hits"] += len(texts) - len(missing)
+    EMBEDDING_CACHE_STATS["misses"] += len(missing)
+
     embedding_model = get_embedding_model()
+    missing_texts = [text for _, text in missing]
+    batches = [
+        missing_texts[i:i + EMBED_BATCH_SIZE]
+        for i in range(0, len(missing_texts), EMBED_BATCH_SIZE)
+    ]
 
-    # ✅ Load existing FAISS index ONLY if index file exists
-    if os.path.exists(INDEX_FILE):
-        return FAISS.load_local(
-            FAISS_DIR,
-            embedding_model,
-            allow_dangerous_deserialization=True
+    new_vectors = []
+    done = len(texts) - len(missing)
+
+    def report(batch_vectors):
+        nonlocal done
+        new_vectors.extend(batch_vectors)
+        done += len(batch_vectors)
+        if progress:
+            progress("embedding", done, len(texts))
+
+    if EMBED_WORKERS > 1 and len(batches) > 1:
+        # torch releases the GIL while encoding, so threads scale here
+        with ThreadPoolExecutor(max_workers=EMBED_WORKERS) as pool:
+            for batch_vectors in pool.map(embedding_model.embed_documents, batches):
+                report(batch_vectors)
+    else:
+        for batch in batches:
+            report(embedding_model.embed_documents(batch))
+
+    fresh = [(h, vector) for (h, _), vector in zip(missing, new_vectors)]
+    if EMBEDDING_CACHE_ENABLED:
+        save_cached_embeddings(model_id, fresh)
+
+    known.update(fresh)
+    return [known[h] for h in hashes]
+
+
+def add_chunks(vector_store, chunks: list, ids: list, progress=None, vectors=None):
+    """
+    Embed ONLY the given chunks (unless vectors are passed) and add them
+    to the store
+    """
+    texts = [chunk.page_content for chunk in chunks]
+    metadatas = [chunk.metadata for chunk in chunks]
+    if vectors is None:
+        vectors = embed_texts(texts, progress)
+    text_embeddings = list(zip(texts, vectors))
+
+    if vector_store is None:
+        vector_store = FAISS.from_embeddings(
+            text_embeddings,
+            get_embedding_model(),
+            metadatas=metadatas,
+            ids=ids
         )
+        get_lexical_index(vector_store)
+        return vector_store
+
+    lexical_index = get_lexical_index(vector_store)
+    ids = vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+
+    for doc_id, text in zip(ids, texts):
+        lexical_index.add(doc_id, text)
+
+    return vector_store
+
+
+def delete_chunks(vector_store, ids: list):
+    get_lexical_index(vector_store).remove_many(ids)
+    remove_vectors(vector_store, ids)
+
+
+def finalize_index(vector_store):
+    """
+    Rebuild the index as the type its final size calls for, once per save
+    rather than after every added batch.
+
+    Vectors come back exact from the embedding cache (never reconstructed
+    from a lossy index): IVF trains on a sample of them, then everything
+    is added in REINDEX_BATCH batches.
+    """
+    index_type = reindex_target(vector_store.index)
+    if index_type is None:
+        return
+
+    texts = [
+        vector_store.docstore.search(doc_id).page_content
+        for _, doc_id in sorted(vector_store.index_to_docstore_id.items())
+    ]
+
+    def vectors_for(batch):
+        return np.array(embed_texts(batch), dtype=np.float32)
+
+    index = new_index(vector_store.index.d, len(texts), index_type)
+    if not index.is_trained:
+        sample_size = min(len(texts), training_size(index))
+        sample = np.random.default_rng(0).choice(len(texts), sample_size, replace=False)
+        index.train(vectors_for([texts[i] for i in sorted(sample)]))
+
+    for i in range(0, len(texts), REINDEX_BATCH):
+        index.add(vectors_for(texts[i:i + REINDEX_BATCH]))
+
+    vector_store.index = index
+
+
+def build_vector_store(pdf_paths: list):
+    # ✅ Load existing FAISS index ONLY if index file exists
+    if has_index():
+        return load_vector_store()
 
     # ❌ No PDFs → do NOT build
     if not pdf_paths:
@@ -28,42 +346,208 @@ def build_vector_store(pdf_paths: list):
 
     documents = []
     for path in pdf_paths:
-        loader = PyPDFLoader(path)
-        documents.extend(loader.load())
+        documents.extend(load_pdf_chunks(path))
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=50
-    )
-    chunks = splitter.split_documents(documents)
+    vector_store = add_chunks(None, documents, None)
 
-    vector_store = FAISS.from_documents(chunks, embedding_model)
-    vector_store.save_local(FAISS_DIR)
+    directory = new_index_dir()
+    save_vector_store(vector_store, directory)
+    publish_index_dir(directory)
 
-    return vector_store
+    return load_vector_store()
+
+
+# --------------------------------
+# Query caches (process-wide)
+# --------------------------------
+QUERY_EMBEDDING_CACHE = LRUCache(maxsize=2048, ttl=24 * 3600)
+RESULT_CACHE = LRUCache(maxsize=512, ttl=3600)
 
 
-def retrieve_context(query: str, k: int = 4) -> str:
+def embed_query_cached(query: str) -> list:
     """
-    Retrieve relevant chunks ONLY from user-uploaded PDFs
+    Normalized query text → embedding, skipping MiniLM on repeats
+    """
+    key = (get_embedding_model_id(), normalize_query(query))
+
+    vector = QUERY_EMBEDDING_CACHE.get(key)
+    if vector is None:
+        vector = get_embedding_model().embed_query(key[1])
+        QUERY_EMBEDDING_CACHE.put(key, vector)
+
+    return vector
+
+
+RETRIEVAL_STATS = {"lexical_fast_path": 0, "hybrid": 0, "dense": 0, "tokens_saved": 0}
+
+
+def get_cache_stats() -> dict:
+    return {
+        "query_embeddings": QUERY_EMBEDDING_CACHE.stats(),
+        "results": RESULT_CACHE.stats(),
+        "retrieval": dict(RETRIEVAL_STATS),
+        "chunk_embeddings": dict(EMBEDDING_CACHE_STATS),
+    }
+
+
+def l2_to_cosine(distance: float) -> float:
+    # Squared L2 between unit vectors: d = 2 - 2·cos
+    return 1.0 - float(distance) / 2.0
+
+
+def dense_search(vector_store, query: str, k: int):
+    """
+    Returns (docs, best cosine similarity)
+    """
+    hits = vector_store.similarity_search_with_score_by_vector(
+        embed_query_cached(query),
+        k=k
+    )
+    if not hits:
+        return [], 0.0
+
+    return [doc for doc, _ in hits], max(l2_to_cosine(d) for _, d in hits)
+
+
+def hybrid_search(vector_store, query: str, k: int):
+    """
+    BM25 + dense retrieval fused with reciprocal-rank fusion.
+    Returns (docs, best dense cosine similarity).
     """
+    fetch_k = max(k * 3, 10)
+    lexical_index = get_lexical_index(vector_store)
+    lexical_hits = lexical_index.search(query, fetch_k)
+
+    lexical_docs = []
+    for doc_id, _, _ in lexical_hits:
+        doc = vector_store.docstore.search(doc_id)
+        if isinstance(doc, Document):
+            lexical_docs.append(doc)
+
+    # ⚡ Fast path: best chunk holds every query term and clearly wins →
+    # skip the ANN search and fusion; the hits still get a real cosine
+    # score (cached query embedding · cached chunk embeddings) so the
+    # relevance threshold applies
+    n_terms = len(set(tokenize(query)))
+    if (
+        LEXICAL_FAST_PATH
+        and lexical_docs
+        and n_terms
+        and lexical_hits[0][2] == n_terms
+        and (
+            len(lexical_hits) == 1
+            or lexical_hits[0][1] >= LEXICAL_FAST_PATH_RATIO * lexical_hits[1][1]
+        )
+    ):
+        RETRIEVAL_STATS["lexical_fast_path"] += 1
+        docs = lexical_docs[:k]
+        query_vector = np.array(embed_query_cached(query), dtype=np.float32)
+        doc_vectors = np.array(
+            embed_texts([doc.page_content for doc in docs]),
+            dtype=np.float32
+        )
+        similarities = doc_vectors @ query_vector / (
+            np.linalg.norm(doc_vectors, axis=1) * np.linalg.norm(query_vector) + 1e-12
+        )
+        return docs, float(similarities.max())
+
+    RETRIEVAL_STATS["hybrid"] += 1
+    dense_docs, score = dense_search(vector_store, query, fetch_k)
+
+    docs_by_text = {}
+    rankings = []
+    for docs in (dense_docs, lexical_docs):
+        ranking = []
+        for doc in docs:
+            docs_by_text.setdefault(doc.page_content, doc)
+            ranking.append(doc.page_content)
+        rankings.append(ranking)
 
+    fused = reciprocal_rank_fusion(rankings)
+    return [docs_by_text[text] for text in fused[:k]], score
+
+
+EMPTY_RESULT = {"context": "", "score": 0.0, "stats": None}
+
+
+def retrieve(query: str, vector_store, k: int = RAG_TOP_K, kb_version: str = None) -> dict:
+    """
+    Session-free retrieval: {"context": str, "score": float, "stats": dict}
+
+    score is the best cosine similarity between the query and any chunk.
+    """
     # 🛑 Guard 1: No vector store
-    if "vector_store" not in st.session_state or st.session_state.vector_store is None:
-        return ""
+    if vector_store is None:
+        return EMPTY_RESULT
 
     # 🛑 Guard 2: Ignore greetings / very short queries
     if len(query.strip()) < 5:
-        return ""
+        return EMPTY_RESULT
+
+    # Results are only valid for the KB version they were computed on
+    result_key = (kb_version, normalize_query(query), k)
+    cached = RESULT_CACHE.get(result_key)
+    if cached is not None:
+        return cached
 
-    vector_store = st.session_state.vector_store
+    # Over-fetch, then dedupe / diversify / pack into the token budget
+    fetch_k = max(k, CONTEXT_CANDIDATES)
 
     try:
-        docs = vector_store.similarity_search(query, k=k)
+        if HYBRID_SEARCH:
+            docs, score = hybrid_search(vector_store, query, fetch_k)
+        else:
+            RETRIEVAL_STATS["dense"] += 1
+            docs, score = dense_search(vector_store, query, fetch_k)
     except Exception:
-        return ""
+        return EMPTY_RESULT
 
     if not docs:
-        return ""
+        return EMPTY_RESULT
+
+    context, stats = pack_context([doc.page_content for doc in docs], k)
+    RETRIEVAL_STATS["tokens_saved"] += stats["tokens_saved"]
+
+    result = {"context": context, "score": score, "stats": stats}
+    RESULT_CACHE.put(result_key, result)
 
-    return "\n\n".join(doc.page_content for doc in docs)
+    return result
+
+
+def retrieve_scored(query: str, k: int = RAG_TOP_K, vector_store=None, clinic_name: str = None) -> dict:
+    """
+    Retrieve relevant chunks ONLY from user-uploaded PDFs, plus whether
+    they clear the calibrated relevance threshold.
+
+    When the question names a clinic, only that clinic's shard is searched.
+    """
+    cache_version = st.session_state.get("kb_version")
+
+    shard = load_shard(clinic_name) if vector_store is None and SHARD_BY_CLINIC else None
+    if shard is not None:
+        vector_store = shard
+        cache_version = f"{cache_version}:{shard_key(clinic_name)}"
+    elif vector_store is None:
+        vector_store = st.session_state.get("vector_store")
+
+    threshold = get_relevance_threshold()
+    result = dict(retrieve(query, vector_store, k, cache_version))
+
+    # Shard had nothing useful (e.g. clinic mis-detected) → search everything
+    if shard is not None and result["score"] < threshold:
+        result = dict(retrieve(
+            query,
+            st.session_state.get("vector_store"),
+            k,
+            st.session_state.get("kb_version")
+        ))
+
+    result["relevant"] = bool(result["context"]) and result["score"] >= threshold
+    return result
+
+
+def retrieve_context(query: str, k: int = RAG_TOP_K, vector_store=None, clinic_name: str = None) -> str:
+    """
+    Retrieve relevant chunks ONLY from user-uploaded PDFs
+    """
+    return retrieve_scored(query, k, vector_store, clinic_name)["context"]
@@ -0,0 +1,59 @@
+import json
+import os
+
+from config.config import RAG_MIN_SCORE, RAG_MIN_ANSWERABLE_RECALL
+
+THRESHOLD_FILE = "data/relevance_threshold.json"
+
+_cached = {"mtime": None, "threshold": RAG_MIN_SCORE}
+
+
+def get_relevance_threshold() -> float:
+    """
+    Calibrated threshold if present, else RAG_MIN_SCORE
+    """
+    if not os.path.exists(THRESHOLD_FILE):
+        return RAG_MIN_SCORE
+
+    mtime = os.path.getmtime(THRESHOLD_FILE)
+    if _cached["mtime"] != mtime:
+        with open(THRESHOLD_FILE, "r") as f:
+            _cached["threshold"] = float(json.load(f)["threshold"])
+        _cached["mtime"] = mtime
+
+    return _cached["threshold"]
+
+
+def save_relevance_threshold(report: dict):
+    with open(THRESHOLD_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def calibrate_threshold(samples: list, min_recall: float = RAG_MIN_ANSWERABLE_RECALL) -> dict:
+    """
+    samples: [(score, answerable), ...]
+
+    Picks the highest threshold that still lets min_recall of the answerable
+    questions through to the LLM, and reports how many LLM calls it skips.
+    """
+    answerable = sorted(score for score, ok in samples if ok)
+    unanswerable = [score for score, ok in samples if not ok]
+
+    if not answerable:
+        raise ValueError("Need at least one answerable question to calibrate.")
+
+    # Scores at or above this index cover min_recall of the answerable set
+    cut = int((1 - min_recall) * len(answerable))
+    threshold = answerable[cut]
+
+    passed = sum(1 for score in answerable if score >= threshold)
+    blocked = sum(1 for score in unanswerable if score < threshold)
+    skipped = sum(1 for score, _ in samples if score < threshold)
+
+    return {
+        "threshold": round(threshold, 4),
+        "answerable_recall": round(passed / len(answerable), 4),
+        "unanswerable_blocked": round(blocked / len(unanswerable), 4) if unanswerable else None,
+        "llm_calls_skipped": round(skipped / len(samples), 4),
+        "samples": len(samples),
+    }
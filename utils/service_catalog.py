@@ -0,0 +1,198 @@
+from config.config import SERVICE_FUZZY_MIN, SERVICE_MATCH_MIN
+from models.registry import get_resource
+from utils.lexical_index import tokenize
+
+
+def normalize_token(token: str) -> str:
+    """
+    'fillings' → 'filling', 'braces' → 'brace'
+    """
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def name_tokens(text: str) -> list:
+    """
+    'Root Canal Treatments?' → ['root', 'canal', 'treatment']
+    """
+    return [normalize_token(t) for t in tokenize(text)]
+
+
+def trigrams(token: str) -> set:
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _key(tokens: list) -> str:
+    return " ".join(tokens)
+
+
+class ServiceCatalog:
+    """
+    Precomputed lookup over every clinic's services (and clinic names).
+
+    Built once per KB version; lookups touch only the services that share
+    a (typo-corrected) token with the query instead of scanning clinics.
+    """
+
+    def __init__(self, clinics: list):
+        self.services = {}      # key → {"name", "tokens", "clinics"}
+        self.token_index = {}   # token → {service key, ...}
+        self.clinics = {}       # key → clinic
+        self.clinic_index = {}  # token → {clinic key, ...}
+        self.trigram_index = {}  # trigram → {vocabulary token, ...}
+
+        for clinic in clinics:
+            if clinic.get("name"):
+                key = _key(name_tokens(clinic["name"]))
+                self.clinics.setdefault(key, clinic)
+                for token in name_tokens(clinic["name"]):
+                    self.clinic_index.setdefault(token, set()).add(key)
+
+            for service in clinic.get("services", []):
+                tokens = name_tokens(service["name"])
+                if not tokens:
+                    continue
+
+                entry = self.services.setdefault(_key(tokens), {
+                    "name": service["name"].strip(),
+                    "tokens": set(tokens),
+                    "clinics": [],
+                })
+                if clinic not in entry["clinics"]:
+                    entry["clinics"].append(clinic)
+
+                for token in tokens:
+                    self.token_index.setdefault(token, set()).add(_key(tokens))
+
+        for token in set(self.token_index) | set(self.clinic_index):
+            for gram in trigrams(token):
+                self.trigram_index.setdefault(gram, set()).add(token)
+
+    def __len__(self):
+        return len(self.services)
+
+    # ---------------------------
+    # Typo tolerance
+    # ---------------------------
+    def correct_token(self, token: str):
+        """
+        Closest vocabulary token by trigram Dice similarity → (token, similarity)
+        """
+        if token in self.token_index or token in self.clinic_index:
+            return token, 1.0
+        if len(token) < 4:
+            return None, 0.0
+
+        grams = trigrams(token)
+        shared = {}
+        for gram in grams:
+            for candidate in self.trigram_index.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        best, best_score = None, 0.0
+        for candidate, count in shared.items():
+            score = 2 * count / (len(grams) + len(trigrams(candidate)))
+            if score > best_score:
+                best, best_score = candidate, score
+
+        if best_score < SERVICE_FUZZY_MIN:
+            return None, 0.0
+        return best, best_score
+
+    def _query_tokens(self, text: str):
+        """
+        text → ({vocabulary token: similarity}, number of query words)
+        """
+        words = set(name_tokens(text))
+        matched = {}
+        for token in words:
+            corrected, score = self.correct_token(token)
+            if corrected and score > matched.get(corrected, 0.0):
+                matched[corrected] = score
+        return matched, len(words)
+
+    def _rank(self, text: str, index: dict) -> list:
+        query, n_words = self._query_tokens(text)
+        if not query:
+            return []
+
+        candidates = set()
+        for token in query:
+            candidates |= index.get(token, set())
+
+        ranked = []
+        for key in candidates:
+            tokens = set(key.split())
+            overlap = sum(query.get(token, 0.0) for token in tokens)
+            # Query inside the name ('cleaning') or name inside the query
+            # ('is teeth cleaning available?') both count as a full match
+            score = overlap / min(len(tokens), n_words)
+            tie_break = overlap / (len(tokens) + n_words - overlap)
+            ranked.append((key, score, tie_break))
+
+        ranked.sort(key=lambda item: (item[1], item[2]), reverse=True)
+        return ranked
+
+    # ---------------------------
+    # Services
+    # ---------------------------
+    def match_services(self, text: str) -> list:
+        """
+        Service entries matching text, best first
+        """
+        top = None
+        matches = []
+        for key, score, tie_break in self._rank(text, self.token_index):
+            if score < SERVICE_MATCH_MIN:
+                break
+            if top is None:
+                top = score
+            # Keep every equally good match ('consultation' → all consultations)
+            if score < top:
+                break
+            matches.append(self.services[key])
+        return matches
+
+    def clinics_for(self, text: str) -> list:
+        clinics = []
+        for entry in self.match_services(text):
+            for clinic in entry["clinics"]:
+                if clinic not in clinics:
+                    clinics.append(clinic)
+        return clinics
+
+    def is_available(self, text: str) -> bool:
+        return bool(self.match_services(text))
+
+    # ---------------------------
+    # Clinics
+    # ---------------------------
+    def match_clinic(self, text: str, clinics: list = None):
+        """
+        Clinic named in text (most of its name words, typos allowed),
+        optionally restricted to the given clinics
+        """
+        query, _ = self._query_tokens(text)
+        for key, _, _ in self._rank(text, self.clinic_index):
+            clinic = self.clinics[key]
+            if clinics is not None and clinic not in clinics:
+                continue
+
+            tokens = key.split()
+            if sum(1 for t in tokens if t in query) >= max(1, len(tokens) - 1):
+                return clinic
+
+        return None
+
+
+def get_service_catalog(clinics: list, kb_version: str) -> ServiceCatalog:
+    """
+    One catalog per KB version, shared by every session in the process
+    """
+    return get_resource(
+        "service_catalog",
+        lambda: ServiceCatalog(clinics),
+        (kb_version,)
+    )
@@ -0,0 +1,185 @@
+# utils/slot_engine.py
+from datetime import date, datetime, timedelta
+
+from config.config import SLOT_MINUTES, SLOT_CAPACITY, CLINIC_SLOT_CAPACITY
+from utils.database import connection
+from utils.clinic_schedule import ClinicSchedule, parse_clock, parse_date
+
+# Overlap with [start, end) on one clinic day; served by idx_bookings_slot
+OVERLAP_SQL = """
+    SELECT COUNT(*) FROM bookings
+    WHERE clinic = ? AND slot_date = ? AND start_min < ? AND end_min > ?
+"""
+# Existing customers keep their details; the no-op update lets RETURNING
+# yield their id in the same statement
+UPSERT_CUSTOMER_SQL = """
+    INSERT INTO customers (name, email, phone) VALUES (?, ?, ?)
+    ON CONFLICT (email) DO UPDATE SET email = excluded.email
+    RETURNING id
+"""
+INSERT_BOOKING_SQL = """
+    INSERT INTO bookings (customer_id, clinic, service, date, time, slot_date, start_min, end_min)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def capacity_for(clinic_name: str) -> int:
+    return CLINIC_SLOT_CAPACITY.get(clinic_name, SLOT_CAPACITY)
+
+
+def slot_bounds(date_input: str, time_input: str):
+    """
+    ('21-01-2026', '10:30 AM') → ('2026-01-21', 630, 660); None if unparseable
+    """
+    day = parse_date(date_input)
+    start = parse_clock(time_input)
+    if day is None or start is None:
+        return None
+    return day.isoformat(), start, start + SLOT_MINUTES
+
+
+def is_past(day: date, start: int = None, now: datetime = None) -> bool:
+    """
+    Day before today, or (with start) a slot today that has already begun
+    """
+    now = now or datetime.now()
+    if day != now.date():
+        return day < now.date()
+    return start is not None and start < now.hour * 60 + now.minute
+
+
+def count_overlapping(conn, clinic_name: str, slot_date: str, start: int, end: int) -> int:
+    return conn.execute(OVERLAP_SQL, (clinic_name, slot_date, end, start)).fetchone()[0]
+
+
+def upsert_customer(conn, name: str, email: str, phone: str) -> int:
+    return conn.execute(UPSERT_CUSTOMER_SQL, (name, email, phone)).fetchone()[0]
+
+
+def is_slot_available(clinic_name: str, date_input: str, time_input: str) -> bool:
+    """
+    Early check while the user is still choosing; book_slot re-checks
+    """
+    bounds = slot_bounds(date_input, time_input)
+    if bounds is None:
+        return False
+
+    with connection() as conn:
+        return count_overlapping(conn, clinic_name, *bounds) < capacity_for(clinic_name)
+
+
+def book_slot(booking: dict):
+    """
+    Insert the booking unless its slot is already at capacity.
+
+    The capacity check, customer upsert and insert share one BEGIN
+    IMMEDIATE transaction (one commit), so concurrent sessions racing for
+    the same slot are serialized by SQLite's write lock and at most
+    `capacity` of them win. Returns the new booking id, or None when the
+    slot is taken.
+    """
+    bounds = slot_bounds(booking["date"], booking["time"])
+    if bounds is None:
+        raise ValueError(f"Unparseable slot: {booking['date']} {booking['time']}")
+
+    slot_date, start, end = bounds
+
+    with connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+
+        if count_overlapping(conn, booking["clinic"], slot_date, start, end) >= capacity_for(booking["clinic"]):
+            conn.rollback()
+            return None
+
+        customer_id = upsert_customer(conn, booking["name"], booking["email"], booking["phone"])
+
+        booking_id = conn.execute(INSERT_BOOKING_SQL, (
+            customer_id,
+            booking["clinic"],
+            booking["service"],
+            booking["date"],
+            booking["time"],
+            slot_date,
+            start,
+            end
+        )).lastrowid
+
+        conn.commit()
+        return booking_id
+
+
+# --------------------------------
+# Availability search
+# --------------------------------
+def booked_slots(clinic_names: list, first_day: date, last_day: date) -> dict:
+    """
+    {(clinic, 'YYYY-MM-DD'): [(start_min, end_min), ...]} in one indexed query
+    """
+    if not clinic_names:
+        return {}
+
+    placeholders = ", ".join("?" for _ in clinic_names)
+    with connection() as conn:
+        rows = conn.execute(
+            f"SELECT clinic, slot_date, start_min, end_min FROM bookings "
+            f"WHERE clinic IN ({placeholders}) AND slot_date BETWEEN ? AND ?",
+            (*clinic_names, first_day.isoformat(), last_day.isoformat())
+        ).fetchall()
+
+    booked = {}
+    for clinic_name, slot_date, start, end in rows:
+        booked.setdefault((clinic_name, slot_date), []).append((start, end))
+    return booked
+
+
+def find_free_slots(
+    clinics: list,
+    service: str = None,
+    first_day: date = None,
+    days: int = 7,
+    limit: int = 3,
+    schedules: dict = None,
+    now: datetime = None,
+) -> list:
+    """
+    Next `limit` free slots across clinics, earliest first:
+    [{"clinic": name, "date": date, "start": min, "end": min}, ...]
+
+    Candidates are the slot grid of each day's open intervals (clinic ∩
+    service hours); a candidate is free when fewer than `capacity` booked
+    intervals overlap it, the same rule book_slot enforces.
+    """
+    now = now or datetime.now()
+    first_day = max(first_day or now.date(), now.date())
+    last_day = first_day + timedelta(days=days - 1)
+    schedules = schedules or {}
+
+    clinics = [clinic for clinic in clinics if clinic.get("name")]
+    booked = booked_slots([clinic["name"] for clinic in clinics], first_day, last_day)
+
+    free = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+
+        for clinic in clinics:
+            schedule = schedules.get(clinic["name"]) or ClinicSchedule(clinic)
+            taken = booked.get((clinic["name"], day.isoformat()), [])
+            capacity = capacity_for(clinic["name"])
+
+            for open_start, open_end in schedule.intervals_on(day, service):
+                start = open_start
+                while start + SLOT_MINUTES <= open_end:
+                    end = start + SLOT_MINUTES
+                    if not is_past(day, start, now) and sum(
+                        1 for booked_start, booked_end in taken
+                        if booked_start < end and booked_end > start
+                    ) < capacity:
+                        free.append({"clinic": clinic["name"], "date": day, "start": start, "end": end})
+                    start = end
+
+        # Days are scanned in order, so an earlier day's slots always win
+        if len(free) >= limit:
+            break
+
+    free.sort(key=lambda slot: (slot["date"], slot["start"]))
+    return free[:limit]
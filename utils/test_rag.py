@@ -1,6 +1,6 @@
-from utils.rag_pipeline import build_or_load_vector_store
+from utils.rag_pipeline import build_vector_store
 
-vector_store = build_or_load_vector_store(["docs/clinic_info.pdf"])
+vector_store = build_vector_store(["docs/clinic_info.pdf"])
 
 docs = vector_store.similarity_search("What are the working hours?")
 
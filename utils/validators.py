@@ -36,14 +36,3 @@ def is_valid_time(time_str: str) -> bool:
         re.match(r"\d{1,2}(:\d{2})?\s?(am|pm)", time_str)
         or re.match(r"\d{1,2}:\d{2}", time_str)
     )
-def is_service_available(service_name: str) -> bool:
-    service_name = service_name.lower()
-
-    clinics = st.session_state.get("clinics", [])
-
-    for clinic in clinics:
-        for service in clinic.get("services", []):
-            if service_name in service["name"].lower():
-                return True
-
-    return False
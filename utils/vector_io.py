@@ -0,0 +1,148 @@
+import json
+import mmap
+import os
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+
+# On-disk layout (no pickle):
+#   index.faiss    FAISS index, memory-mapped read-only by readers
+#   docs.blob      UTF-8 chunk texts, back to back
+#   docs.offsets   int64 .npy, byte offsets into docs.blob (n + 1 entries)
+#   docs.json      {"ids": [...], "metadatas": [...]} in index order
+INDEX_NAME = "index.faiss"
+BLOB_NAME = "docs.blob"
+OFFSETS_NAME = "docs.offsets"
+META_NAME = "docs.json"
+LEGACY_PICKLE = "index.pkl"
+
+
+class MmapDocstore(Docstore):
+    """
+    Read-only docstore: texts are sliced out of a memory-mapped blob
+    """
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, META_NAME), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.ids = meta["ids"]
+        self.metadatas = meta["metadatas"]
+        self.positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self.offsets = np.load(os.path.join(directory, OFFSETS_NAME), mmap_mode="r")
+
+        blob_path = os.path.join(directory, BLOB_NAME)
+        if os.path.getsize(blob_path):
+            with open(blob_path, "rb") as f:
+                self.blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.blob = b""
+
+    def search(self, search: str):
+        position = self.positions.get(search)
+        if position is None:
+            return f"ID {search} not found."
+
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return Document(
+            id=search,
+            page_content=self.blob[start:end].decode("utf-8"),
+            metadata=self.metadatas[position]
+        )
+
+    def add(self, texts: dict):
+        raise NotImplementedError("MmapDocstore is read-only; load the store writable")
+
+    def delete(self, ids: list):
+        raise NotImplementedError("MmapDocstore is read-only; load the store writable")
+
+
+def _replace(path: str, write):
+    # Write to a temp file and rename so mmap readers keep the old inode
+    tmp_path = path + ".tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_store(vector_store, directory: str):
+    os.makedirs(directory, exist_ok=True)
+
+    ids = [doc_id for _, doc_id in sorted(vector_store.index_to_docstore_id.items())]
+    texts = []
+    metadatas = []
+    for doc_id in ids:
+        doc = vector_store.docstore.search(doc_id)
+        texts.append(doc.page_content.encode("utf-8"))
+        metadatas.append(doc.metadata)
+
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(t) for t in texts])
+
+    def write_blob(path):
+        with open(path, "wb") as f:
+            for text in texts:
+                f.write(text)
+
+    def write_offsets(path):
+        with open(path, "wb") as f:
+            np.save(f, offsets)
+
+    def write_meta(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "metadatas": metadatas}, f)
+
+    _replace(os.path.join(directory, BLOB_NAME), write_blob)
+    _replace(os.path.join(directory, OFFSETS_NAME), write_offsets)
+    _replace(os.path.join(directory, META_NAME), write_meta)
+    _replace(
+        os.path.join(directory, INDEX_NAME),
+        lambda path: faiss.write_index(vector_store.index, path)
+    )
+
+
+def load_store(directory: str, embeddings, writable: bool = False):
+    """
+    Readers get a memory-mapped, read-only store shared through the page
+    cache; writers get a private in-memory copy they can add to / delete from.
+    """
+    index_path = os.path.join(directory, INDEX_NAME)
+
+    # Old index.faiss + index.pkl layout: served as-is until the next
+    # sync rebuilds it as a versioned directory
+    if os.path.exists(os.path.join(directory, LEGACY_PICKLE)):
+        return FAISS.load_local(
+            directory,
+            embeddings,
+            allow_dangerous_deserialization=True
+        )
+
+    if writable:
+        index = faiss.read_index(index_path)
+    else:
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        if hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+            flags |= faiss.IO_FLAG_MMAP_IFC
+        else:
+            # Older faiss only maps IVF lists; flat / HNSW load into RAM
+            print(f"⚠️ FAISS {faiss.__version__} has no IO_FLAG_MMAP_IFC: {index_path} is not memory-mapped")
+        index = faiss.read_index(index_path, flags)
+
+    docstore = MmapDocstore(directory)
+    index_to_docstore_id = dict(enumerate(docstore.ids))
+
+    if writable:
+        docstore = InMemoryDocstore({
+            doc_id: docstore.search(doc_id)
+            for doc_id in index_to_docstore_id.values()
+        })
+
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id
+    )